@@ -12,8 +12,8 @@ npm run dev -- --host 0.0.0.0 --port 8081 &
 
 # Start Nexus ADK Backend (FastAPI) on port 8080 (Mapped to host 8090)
 cd /workspace/tools/Nexus_Connector/
-echo "Starting Swarm Worker..."
-python3 -m backend.swarm_worker &
+echo "Starting Swarm Worker pool..."
+python3 -m backend.swarm_supervisor &
 
 echo "Starting Nexus ADK Backend..."
 python3 -m backend.main
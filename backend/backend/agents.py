@@ -1,15 +1,17 @@
 import os
+import time
 import yaml
+import hashlib
 import logging
-from google.adk.agents import Agent, LlmAgent
-from google.adk.runners import Runner
-from .vram_manager import vram_manager, VRAM_MANAGER_PRIMARY, VRAM_MANAGER_SENTINEL
-from google.genai.types import Content, Part
-from .mcp_client import nexus_mcp
-from google.adk.models import LiteLlm  # Essential for ADK 1.22.0
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Awaitable, Callable, Optional
+from .vram_manager import vram_manager, VRAM_MANAGER_SENTINEL
+from .response_cache import response_cache
 
-# Persistent session service (PostgreSQL with memory fallback)
-from .pg_session_service import session_service
+# google.adk, the session service and the tool clients are imported on first
+# use, so importing this module (and the backend) stays fast
+if TYPE_CHECKING:
+    from google.adk.agents import LlmAgent
+    from google.adk.runners import Runner
 
 # 🤖 AGENT TEAM DEFINITION
 # This module defines the 4-agent swarm using Google ADK.
@@ -19,13 +21,14 @@ logger = logging.getLogger("agents")
 
 # Load configuration - corrected path for container volume
 CONFIG_PATH = "/workspace/tools/Nexus_Connector/config/agent_models.yaml"
+CONFIG_CHECK_INTERVAL = 5.0  # seconds between checks for an edited config
 
-def load_config():
+def load_config(path: str = CONFIG_PATH):
     try:
-        with open(CONFIG_PATH, "r") as f:
+        with open(path, "r") as f:
             return yaml.safe_load(f)
     except FileNotFoundError:
-        logger.warning(f"Config not found at {CONFIG_PATH}, using defaults")
+        logger.warning(f"Config not found at {path}, using defaults")
         return {
             "models": {
                 "manager": {"model": "qwen3:14b"},
@@ -39,163 +42,332 @@ def load_config():
             }
         }
 
-config = load_config()
-models = config["models"]
-
 # --- Agent Definitions using Google ADK LlmAgent ---
 
-# 1. Nexus (Manager) - Primarily uses qwen3:8b
-# Orchestrates tasks and routes to specialists.
-manager = LlmAgent(
-    name="Nexus",
-    model=LiteLlm(f"ollama_chat/{models['manager']['model']}"),
-    instruction=(
-        "You are Nexus Prime, the manager of the ADK Swarm.\n"
-        "1. Dispatch tasks to Architect (Operator/Auditor) as needed.\n"
-        "2. If the user asks to 'switch model', 'use deepseek', or 'wake up a specialist', acknowledge the request. "
-        "The system will handle the VRAM swap automatically based on your routing.\n"
-        "3. Keep responses concise and professional."
-    ),
-    sub_agents=[]  # Will be populated below
-)
-
-from .n8n_utils import N8nWorkflowBuilder, TOOLS
-from .architect_tools import architect_tools
-from .social import post_x_tweet, post_discord_alert
-
-# 2. Architect (Coder & System Designer) - deepseek-r1:14b
-# Handles code, filesystem, and n8n workflow generation.
-architect = LlmAgent(
-    name="Architect",
-    model=LiteLlm(f"ollama_chat/{models['coder']['model']}"),
-    instruction=(
-        "You are The Architect. Your mission is system self-expansion through high-quality code and n8n workflows.\n"
-        "1. Generate Python code and manage the filesystem via MCP tools.\n"
-        "2. Design and generate n8n JSON workflows using the build_and_register_workflow tool.\n"
-        "   - WEBHOOKS: Use path name related to the task.\n"
-        "   - NODES: Include 'id', 'name', 'type' (e.g., n8n-nodes-base.httpRequest), and 'position'.\n"
-        "   - CONNECTIONS: Map outputs to inputs in the 'main' array. Index 0 is standard.\n"
-        "3. TRIGGER existing n8n workflows using the trigger_n8n_workflow tool. \n"
-        "   - Use path 'nexus-router' for general routing.\n"
-        "4. CONSULT the Knowledge Base via the search_vault_council tool.\n"
-        "When asked to 'create a tool' or 'build a workflow', call the build_and_register_workflow tool."
-    ),
-    tools=[
-        architect_tools.build_and_register_workflow,
-        architect_tools.trigger_n8n_workflow,
-        architect_tools.search_vault_council
-    ]
-)
-
-# 3. Operator (Browser) - qwen3-vl:8b
-# Vision-based browser automation.
-operator = LlmAgent(
-    name="Operator",
-    model=LiteLlm(f"ollama_chat/{models['browser']['model']}"),
-    instruction="You are The Operator. You control the browser and analyze screenshots to automate web tasks."
-)
-
-# 4. Auditor (Security) - granite3.3:8b
-# Reviews all code for security vulnerabilities.
-auditor = LlmAgent(
-    name="Auditor",
-    model=LiteLlm(f"ollama_chat/{models['auditor']['model']}"),
-    instruction="You are The Auditor. Perform rigorous security scans on all code and detect generic vulnerabilities or drainer logic."
-)
-
-# 5. Social (Engagement & Alerts) - qwen3:8b
-# Manages social media presence and community alerts.
-social_agent = LlmAgent(
-    name="Social",
-    model=LiteLlm(f"ollama_chat/{models['auditor']['model']}"),
-    instruction=(
-        "You are The Social Agent. Your mission is to engage the community and broadcast system updates.\n"
-        "1. Post updates, alpha, and milestones to X (Twitter) using the post_x_tweet tool.\n"
-        "2. Send important alerts and trade reports to Discord via post_discord_alert.\n"
-        "3. Maintain a 'Rick' aesthetic: intelligent, slightly cynical, and highly technical."
-    ),
-    tools=[post_x_tweet, post_discord_alert]
-)
-
-# Set up swarm hierarchy - manager delegates to sub-agents
-manager.sub_agents = [architect, operator, auditor, social_agent]
+def build_swarm(models: dict) -> "LlmAgent":
+    """Builds the manager and its specialists from the 'models' section of the config."""
+    from google.adk.agents import LlmAgent
+    from google.adk.models import LiteLlm  # Essential for ADK 1.22.0
+    from .architect_tools import architect_tools
+    from .social import post_x_tweet, post_discord_alert
+
+    # 1. Nexus (Manager) - Primarily uses qwen3:8b
+    # Orchestrates tasks and routes to specialists.
+    manager = LlmAgent(
+        name="Nexus",
+        model=LiteLlm(f"ollama_chat/{models['manager']['model']}"),
+        instruction=(
+            "You are Nexus Prime, the manager of the ADK Swarm.\n"
+            "1. Dispatch tasks to Architect (Operator/Auditor) as needed.\n"
+            "2. If the user asks to 'switch model', 'use deepseek', or 'wake up a specialist', acknowledge the request. "
+            "The system will handle the VRAM swap automatically based on your routing.\n"
+            "3. Keep responses concise and professional."
+        ),
+        sub_agents=[]  # Will be populated below
+    )
+
+    # 2. Architect (Coder & System Designer) - deepseek-r1:14b
+    # Handles code, filesystem, and n8n workflow generation.
+    architect = LlmAgent(
+        name="Architect",
+        model=LiteLlm(f"ollama_chat/{models['coder']['model']}"),
+        instruction=(
+            "You are The Architect. Your mission is system self-expansion through high-quality code and n8n workflows.\n"
+            "1. Generate Python code and manage the filesystem via MCP tools.\n"
+            "2. Design and generate n8n JSON workflows using the build_and_register_workflow tool.\n"
+            "   - WEBHOOKS: Use path name related to the task.\n"
+            "   - NODES: Include 'id', 'name', 'type' (e.g., n8n-nodes-base.httpRequest), and 'position'.\n"
+            "   - CONNECTIONS: Map outputs to inputs in the 'main' array. Index 0 is standard.\n"
+            "3. TRIGGER existing n8n workflows using the trigger_n8n_workflow tool. \n"
+            "   - Use path 'nexus-router' for general routing.\n"
+            "4. CONSULT the Knowledge Base via the search_vault_council tool.\n"
+            "When asked to 'create a tool' or 'build a workflow', call the build_and_register_workflow tool."
+        ),
+        tools=[
+            architect_tools.build_and_register_workflow,
+            architect_tools.trigger_n8n_workflow,
+            architect_tools.search_vault_council
+        ]
+    )
+
+    # 3. Operator (Browser) - qwen3-vl:8b
+    # Vision-based browser automation.
+    operator = LlmAgent(
+        name="Operator",
+        model=LiteLlm(f"ollama_chat/{models['browser']['model']}"),
+        instruction="You are The Operator. You control the browser and analyze screenshots to automate web tasks."
+    )
+
+    # 4. Auditor (Security) - granite3.3:8b
+    # Reviews all code for security vulnerabilities.
+    auditor = LlmAgent(
+        name="Auditor",
+        model=LiteLlm(f"ollama_chat/{models['auditor']['model']}"),
+        instruction="You are The Auditor. Perform rigorous security scans on all code and detect generic vulnerabilities or drainer logic."
+    )
+
+    # 5. Social (Engagement & Alerts) - qwen3:8b
+    # Manages social media presence and community alerts.
+    social_agent = LlmAgent(
+        name="Social",
+        model=LiteLlm(f"ollama_chat/{models['auditor']['model']}"),
+        instruction=(
+            "You are The Social Agent. Your mission is to engage the community and broadcast system updates.\n"
+            "1. Post updates, alpha, and milestones to X (Twitter) using the post_x_tweet tool.\n"
+            "2. Send important alerts and trade reports to Discord via post_discord_alert.\n"
+            "3. Maintain a 'Rick' aesthetic: intelligent, slightly cynical, and highly technical."
+        ),
+        tools=[post_x_tweet, post_discord_alert]
+    )
+
+    # Set up swarm hierarchy - manager delegates to sub-agents
+    manager.sub_agents = [architect, operator, auditor, social_agent]
+    return manager
+
+def build_sentinel() -> "LlmAgent":
+    """The low-VRAM watcher that answers simple tasks instead of the full swarm."""
+    from google.adk.agents import LlmAgent
+    from google.adk.models import LiteLlm
+
+    return LlmAgent(
+        name="Sentinel",
+        model=LiteLlm(f"ollama_chat/{VRAM_MANAGER_SENTINEL}"),
+        instruction=(
+            "You are the Nexus Sentinel, a low-VRAM system watcher.\n"
+            "1. Respond concisely to greetings and simple status checks.\n"
+            "2. Do NOT narrate or summarize previous complex tasks unless specifically asked.\n"
+            "3. Your primary job is to tell the user when the swarm is 'Sleeping' or 'Waking up'."
+        )
+    )
+
+
+class RunnerCache:
+    """
+    Agent graphs and their Runners, built once per routed model and kept for
+    the process lifetime. The config file is re-checked at most every
+    CONFIG_CHECK_INTERVAL seconds; everything is rebuilt only if its content changed.
+    """
+    def __init__(self, config_path: str = CONFIG_PATH):
+        self.config_path = config_path
+        self.config: dict = {}
+        self._digest: Optional[str] = None
+        self._mtime: Optional[int] = None
+        self._checked_at = 0.0
+        self._swarm: Optional["LlmAgent"] = None
+        self._runners: dict[str, "Runner"] = {}
+        self.builds = 0
+
+    def _stat(self) -> Optional[int]:
+        try:
+            return os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._swarm is not None and now - self._checked_at < CONFIG_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        mtime = self._stat()
+        if self._swarm is not None and mtime == self._mtime:
+            return
+        self._mtime = mtime
+        config = load_config(self.config_path)
+        digest = hashlib.sha256(yaml.safe_dump(config, sort_keys=True).encode()).hexdigest()
+        if digest == self._digest:
+            return
+        if self._digest is not None:
+            logger.info("🔄 Agent config changed. Rebuilding agents and runners...")
+        self.config = config
+        self._digest = digest
+        self._swarm = build_swarm(config["models"])
+        self._runners.clear()
+        self.builds += 1
+
+    def swarm(self) -> "LlmAgent":
+        self._refresh()
+        return self._swarm
+
+    def scope(self, target_model: str, user_id: Optional[str] = None) -> str:
+        """Response-cache scope: the agent answering, its model, the config that built it and the user asking."""
+        self._refresh()
+        agent = "Sentinel" if target_model == VRAM_MANAGER_SENTINEL else self._swarm.name
+        return f"{agent}/{target_model}/{self._digest[:12]}/{user_id or '-'}"
+
+    def runner(self, target_model: str) -> "Runner":
+        """The Runner for a routed model: the Sentinel for its model, the full swarm otherwise."""
+        self._refresh()
+        key = VRAM_MANAGER_SENTINEL if target_model == VRAM_MANAGER_SENTINEL else "swarm"
+        runner = self._runners.get(key)
+        if runner is None:
+            from google.adk.runners import Runner
+            from .pg_session_service import get_session_service
+
+            agent = build_sentinel() if key == VRAM_MANAGER_SENTINEL else self._swarm
+            runner = self._runners[key] = Runner(
+                agent=agent,
+                app_name="nexus_prime",
+                session_service=get_session_service()
+            )
+        return runner
+
+
+runner_cache = RunnerCache()
 
 # --- Execution Wrapper with VRAM Management ---
 
-async def run_swarm_task(task: str):
-    """Execution wrapper that handles Sentry Mode and VRAM loading."""
+async def stream_swarm_task(task: str, session_id: Optional[str] = None, user_id: Optional[str] = None,
+                            cache: bool = True) -> AsyncGenerator[dict[str, Any], None]:
+    """
+    Execution wrapper that handles Sentry Mode and VRAM loading, yielding the
+    run as it happens:
+      {"type": "text", "delta", "author"}         response text, token by token
+      {"type": "tool_call", "name", "args", "author"}
+      {"type": "tool_result", "name", "author"}
+      {"type": "final", "text", "cached", "model", "tool_calls", "ttft_s", "elapsed_s"}
+    Tasks only share history when they share a `session_id`; callers without
+    one fall back to the shared default session.
+    Repeated tasks are answered from the response cache, per user, unless
+    `cache` is False or the task belongs to a conversation of its own (a cached
+    answer never reaches the session history); answers that involved tool
+    calls are never cached, so side effects always run.
+    """
     logger.info(f"🚀 Nexus receiving task: {task[:50]}...")
-    
+    started = time.monotonic()
+
+    # Check the response cache before anything is loaded
+    routed_model = vram_manager.route_task(task)
+    scope = runner_cache.scope(routed_model, user_id)
+    cache = cache and session_id is None
+    if cache:
+        cached = await response_cache.get(scope, task)
+        if cached is not None:
+            logger.info("⚡ Answered from the response cache.")
+            vram_manager.update_activity()
+            elapsed = round(time.monotonic() - started, 3)
+            yield {"type": "text", "delta": cached, "author": "cache"}
+            yield {"type": "final", "text": cached, "cached": True, "model": routed_model,
+                   "tool_calls": 0, "ttft_s": elapsed, "elapsed_s": elapsed}
+            return
+    else:
+        response_cache.bypass()
+
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+    from google.genai.types import Content, Part
+    from .pg_session_service import get_session_service, DEFAULT_USER_ID, DEFAULT_SESSION_ID
+
+    user_id = str(user_id or DEFAULT_USER_ID)
+    session_id = str(session_id or DEFAULT_SESSION_ID)
+
     # Use VRAM Manager to decide which model to load (1B Sentinel vs 8B Swarm)
     target_model = await vram_manager.prepare_for_task(task)
-    
-    try:
-        # 1. Ensure a session exists (ADK 1.22.0 style)
-        session = await session_service.get_session(
-            app_name="nexus_prime",
-            user_id="nexus-user",
-            session_id="nexus-session"
-        )
-        if not session:
-            session = await session_service.create_session(
-                app_name="nexus_prime",
-                user_id="nexus-user",
-                session_id="nexus-session"
-            )
 
-        # 2. Update agent model based on routing
-        # If it's the Sentinel model, we skip the heavy swarm agents
-        if target_model == VRAM_MANAGER_SENTINEL:
-             current_agent = LlmAgent(
-                 name="Sentinel",
-                 model=LiteLlm(f"ollama_chat/{VRAM_MANAGER_SENTINEL}"),
-                 instruction=(
-                     "You are the Nexus Sentinel, a low-VRAM system watcher.\n"
-                     "1. Respond concisely to greetings and simple status checks.\n"
-                     "2. Do NOT narrate or summarize previous complex tasks unless specifically asked.\n"
-                     "3. Your primary job is to tell the user when the swarm is 'Sleeping' or 'Waking up'."
-                 )
-             )
-        else:
-             current_agent = manager
-
-        # 3. Create a runner and execute the task
-        runner = Runner(
-            agent=current_agent,
+    # 1. Ensure a session exists (ADK 1.22.0 style)
+    session_service = get_session_service()
+    session = await session_service.get_session(
+        app_name="nexus_prime",
+        user_id=user_id,
+        session_id=session_id
+    )
+    if not session:
+        session = await session_service.create_session(
             app_name="nexus_prime",
-            session_service=session_service
+            user_id=user_id,
+            session_id=session_id
         )
-        
-        # 4. Wrap the task in a Content object (ADK 1.22.0 requirement)
-        user_message = Content(role="user", parts=[Part(text=task)])
-        
-        # 5. Iterate over the event stream (ADK 1.22.0 pattern)
-        final_response = ""
-        async for event in runner.run_async(
-            user_id=session.user_id,
-            session_id=session.id,
-            new_message=user_message
-        ):
-            # Capture content parts (ADK 1.22.0)
-            if hasattr(event, "content") and event.content:
-                content = event.content
-                if hasattr(content, "parts"):
-                    for part in content.parts:
-                        # Skip inner monologue/thoughts
-                        if hasattr(part, "thought") and part.thought:
-                            continue
-                        if hasattr(part, "text") and part.text:
-                            final_response += part.text
-                elif isinstance(content, str):
-                    final_response += content
-            
-        # Refresh activity timer after task is done so we don't hibernate while user reads
-        vram_manager.update_activity()
-        
-        return final_response.strip() or "The swarm is standing by. (No response captured)"
-    finally:
-        # We don't unload here anymore! The VRAMManager timer will handle it after 5 mins.
-        pass
-
-# Export for main.py
-swarm = manager  # The manager is the root of the swarm
+
+    # 2. Pick the prebuilt runner for the routed model
+    # If it's the Sentinel model, we skip the heavy swarm agents
+    runner = runner_cache.runner(target_model)
+
+    # 3. Wrap the task in a Content object (ADK 1.22.0 requirement)
+    user_message = Content(role="user", parts=[Part(text=task)])
+
+    # 4. Iterate over the event stream (ADK 1.22.0 pattern)
+    # With SSE streaming each model turn arrives as partial events followed by
+    # one aggregated event repeating the whole text, which is skipped. Models
+    # that do not stream only send the aggregated event, which is then used.
+    final_response = ""
+    tool_calls = 0
+    ttft = None
+    streamed = False
+    async for event in runner.run_async(
+        user_id=session.user_id,
+        session_id=session.id,
+        new_message=user_message,
+        # Partial (token-level) events from the model, as well as the aggregated ones
+        run_config=RunConfig(streaming_mode=StreamingMode.SSE)
+    ):
+        content = getattr(event, "content", None)
+        if not content or not getattr(content, "parts", None):
+            continue
+        partial = bool(getattr(event, "partial", False))
+        author = getattr(event, "author", None)
+        for part in content.parts:
+            function_call = getattr(part, "function_call", None)
+            if function_call and not partial:
+                tool_calls += 1
+                yield {"type": "tool_call", "name": function_call.name,
+                       "args": dict(function_call.args or {}), "author": author}
+                continue
+            function_response = getattr(part, "function_response", None)
+            if function_response and not partial:
+                yield {"type": "tool_result", "name": function_response.name, "author": author}
+                continue
+            # Skip inner monologue/thoughts
+            if getattr(part, "thought", None):
+                continue
+            if not getattr(part, "text", None) or (streamed and not partial):
+                continue
+            if ttft is None:
+                ttft = round(time.monotonic() - started, 3)
+            final_response += part.text
+            yield {"type": "text", "delta": part.text, "author": author}
+        streamed = partial
+
+    # Refresh activity timer after task is done so we don't hibernate while user reads
+    vram_manager.update_activity()
+
+    final_response = final_response.strip()
+    if cache and final_response and not tool_calls:
+        await response_cache.put(scope, task, final_response)
+    yield {
+        "type": "final",
+        "text": final_response or "The swarm is standing by. (No response captured)",
+        "cached": False,
+        "model": target_model,
+        "tool_calls": tool_calls,
+        "ttft_s": ttft,
+        "elapsed_s": round(time.monotonic() - started, 3),
+    }
+
+async def run_swarm_task(task: str, on_text: Optional[Callable[[str], Awaitable[None]]] = None,
+                         session_id: Optional[str] = None, user_id: Optional[str] = None,
+                         cache: bool = True) -> str:
+    """
+    stream_swarm_task collected into the final response text.
+    `on_text` is awaited with each text delta as it arrives.
+    """
+    result = ""
+    async for event in stream_swarm_task(task, session_id=session_id, user_id=user_id, cache=cache):
+        if event["type"] == "text" and on_text:
+            await on_text(event["delta"])
+        elif event["type"] == "final":
+            result = event["text"]
+    return result
+
+def get_swarm() -> "LlmAgent":
+    """The current root agent, rebuilt if the agent config changed."""
+    return runner_cache.swarm()
+
+def __getattr__(name: str):
+    # Module-level names of the eagerly built graph, now built on first access.
+    # The manager is the root of the swarm; prefer get_swarm().
+    if name in ("manager", "swarm"):
+        return runner_cache.swarm()
+    if name == "config":
+        runner_cache.swarm()
+        return runner_cache.config
+    if name == "models":
+        return __getattr__("config")["models"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
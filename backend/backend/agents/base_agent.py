@@ -63,7 +63,8 @@ class BaseAgent(ABC):
                 "detail": detail,
                 "timestamp": asyncio.get_event_loop().time()
             }
-            await bus.publish("swarm_status", payload)
+            # Status bursts from many agents coalesce into one NOTIFY round trip
+            await bus.batched().publish("swarm_status", payload)
         self.logger.info(f"📊 Status: [{status}] {detail}")
 
     @abstractmethod
@@ -1,5 +1,5 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, WebSocket, WebSocketDisconnect, UploadFile, File, Form
-from fastapi.responses import Response, FileResponse
+from fastapi.responses import Response, FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Dict, Any, Optional, List
@@ -28,11 +28,9 @@ from database import async_session_factory
 from models import FactoryAsset, AssetStatus, IncidentTicket, TicketSeverity, TicketStatus
 from sqlalchemy import select, delete, update
 
-# Voice Engine imports
-try:
-    from kokoro_onnx import Kokoro
-except ImportError:
-    Kokoro = None
+# Voice Engine: kokoro_onnx (and onnxruntime) is only imported when /tts is called
+import importlib.util
+KOKORO_AVAILABLE = importlib.util.find_spec("kokoro_onnx") is not None
 
 load_dotenv()
 
@@ -57,6 +55,13 @@ async def lifespan(app: FastAPI):
     asyncio.create_task(asset_reaper())
     logger.info("💀 Reaper: Asset Cleanup Daemon started.")
     
+    # Single-node mode: the in-process bus only reaches a worker in this process
+    from .nexus_bus import bus, MemoryBus
+    if isinstance(bus, MemoryBus):
+        from .swarm_worker import worker_loop
+        app.state.swarm_worker = asyncio.create_task(worker_loop())
+        logger.info("🐝 Embedded Swarm Worker started (memory bus).")
+    
     yield
     # Shutdown: Clean up resources
     await app.state.client.aclose()
@@ -119,18 +124,18 @@ app.add_middleware(
 # Lazy imports to avoid circular dependencies
 _agents_loaded = False
 _vram_manager = None
-_run_swarm_task = None
-_swarm = None
+_stream_swarm_task = None
+_get_swarm = None
 _metrics = None
 
 def _load_agents():
-    global _agents_loaded, _vram_manager, _run_swarm_task, _swarm
+    global _agents_loaded, _vram_manager, _stream_swarm_task, _get_swarm
     if not _agents_loaded:
         try:
-            from .agents import run_swarm_task, swarm
+            from .agents import stream_swarm_task, get_swarm
             from .vram_manager import vram_manager
-            _run_swarm_task = run_swarm_task
-            _swarm = swarm
+            _stream_swarm_task = stream_swarm_task
+            _get_swarm = get_swarm
             _vram_manager = vram_manager
             _agents_loaded = True
         except Exception as e:
@@ -155,6 +160,10 @@ tasks = TaskStore()
 
 class TaskRequest(BaseModel):
     task: str
+    session_id: Optional[str] = None  # continue this conversation; omitted = shared default session
+    user_id: Optional[str] = None
+    cache: bool = True  # False forces a fresh answer instead of a cached one
+    stream: bool = False  # /run_task: answer with NDJSON events as they are generated
 
 # ============== CONFIGURATION ==============
 
@@ -244,7 +253,8 @@ async def get_status():
     try:
         _load_agents()
         loaded_models = await _vram_manager.get_loaded_models()
-        sub_agents = _swarm.sub_agents if hasattr(_swarm, 'sub_agents') else []
+        swarm = _get_swarm()  # Rebuilt if the agent config changed
+        sub_agents = swarm.sub_agents if hasattr(swarm, 'sub_agents') else []
         
         return {
             "status": tasks.status,
@@ -253,7 +263,7 @@ async def get_status():
             "agents": [
                 {"name": agent.name, "model": agent.model}
                 for agent in sub_agents
-            ] + [{"name": _swarm.name, "model": _swarm.model, "role": "Manager"}]
+            ] + [{"name": swarm.name, "model": swarm.model, "role": "Manager"}]
         }
     except Exception as e:
         logger.error(f"Status check failed: {e}")
@@ -268,6 +278,8 @@ async def websocket_chat(websocket: WebSocket):
     """WebSocket endpoint for real-time streaming chat with the Swarm."""
     await websocket.accept()
     active_connections.append(websocket)
+    # One conversation per connection unless the client names its own
+    connection_session = f"ws-{uuid.uuid4()}"
     
     try:
         while True:
@@ -289,39 +301,19 @@ async def websocket_chat(websocket: WebSocket):
                 # Send "thinking" status
                 await websocket.send_json({"type": "status", "status": "thinking"})
                 
-                # Execute the task
-                # Ideally _run_swarm_task would support streaming. 
-                # Since the current implementation of run_swarm_task might be blocking/non-streaming,
-                # we will simulate streaming or await the result and then stream it back for the UI effect
-                # if the underlying ADK doesn't expose a stream.
-                # However, for this task "Agent 3", the mission is to "Replace current polling... so responses appear token-by-token".
-                # If the underlying LLM/Swarm doesn't stream, we can't truly stream from the model yet without deeper changes to the ADK agents.
-                # BUT, the prompt asks to "Replace the current polling...". 
-                # We will implement the WebSocket. If the swarm returns the full text, we can "simulate" streaming to the UI 
-                # or better yet, if we can hook into the swarm's generation, we would.
-                # Given the context, we will await the result (existing behavior) and then stream the output to the client 
-                # to satisfy the frontend requirement, unless access to internal generator is available.
-                # Looking at main.py, `_run_swarm_task` is imported.
-                
-                result = await _run_swarm_task(task)
-                result_str = str(result)
-                
-                # Stream response token-by-token (Simulated for smooth UI if backend relies on non-streaming tools for now)
-                # This fulfills the UI requirement of "appearing token-by-token".
-                
-                # Chunk by words or characters
-                chunk_size = 4 # chars
-                for i in range(0, len(result_str), chunk_size):
-                    chunk = result_str[i:i+chunk_size]
-                    await websocket.send_json({
-                        "type": "token",
-                        "token": chunk,
-                        "done": False
-                    })
-                    # Tiny sleep to control pace if it's too fast (optional, but good for UX if completely fake streaming)
-                    # asyncio.sleep(0.01) 
-                    await asyncio.sleep(0.01)
-                
+                # Stream the response token-by-token as the swarm generates it
+                async for event in _stream_swarm_task(task, session_id=data.get("session_id") or connection_session,
+                                                      user_id=data.get("user_id"), cache=data.get("cache", True)):
+                    if event["type"] == "text":
+                        await websocket.send_json({"type": "token", "token": event["delta"], "done": False})
+                    elif event["type"] == "tool_call":
+                        await websocket.send_json({"type": "tool_call", "name": event["name"], "author": event["author"]})
+                    elif event["type"] == "final":
+                        await websocket.send_json({
+                            "type": "summary",
+                            **{k: event[k] for k in ("cached", "model", "tool_calls", "ttft_s", "elapsed_s")}
+                        })
+
                 # Send completion
                 await websocket.send_json({"type": "token", "token": "", "done": True})
                 
@@ -356,6 +348,42 @@ async def get_gpu_metrics():
     metrics = _load_metrics()
     return metrics.get_gpu_metrics()
 
+@app.get("/metrics/bus")
+async def get_bus_metrics():
+    """Per-channel Swarm Bus counters, histograms and subscriber queue depths."""
+    from .nexus_bus import bus
+    return bus.metrics_snapshot()
+
+@app.get("/metrics/swarm")
+async def get_swarm_worker_metrics():
+    """Embedded swarm worker: in-flight tasks, priority lanes and VRAM budget."""
+    from .swarm_worker import worker_stats
+    return worker_stats()
+
+# ============== SWARM WORKERS ==============
+
+@app.get("/swarm/workers")
+async def get_swarm_workers():
+    """Live swarm workers from their latest heartbeats: current tasks, loaded models, queue depth."""
+    from .worker_registry import worker_registry
+    try:
+        return {"workers": await worker_registry.live_workers()}
+    except Exception as e:
+        logger.error(f"Worker registry failed: {e}")
+        return {"error": str(e)}
+
+@app.post("/swarm/workers/reclaim")
+async def reclaim_swarm_tasks(worker_id: Optional[str] = None):
+    """
+    Releases durable tasks and result keys held by dead workers, or by the
+    given (hung) worker, for immediate retry. In notify mode only result keys
+    are released.
+    """
+    from .worker_registry import worker_registry
+    if not worker_registry.persistent:
+        return {"reclaimed": [], "detail": "Leases only exist on the Postgres bus."}
+    return {"reclaimed": await worker_registry.reclaim_stuck(worker_id)}
+
 # ============== CRYPTO PRICES (CoinGecko Proxy) ==============
 
 # Cache to avoid rate limits
@@ -1039,7 +1067,10 @@ async def rebuild_container(name: str):
 
 @app.post("/run_task")
 async def execute_task(request: TaskRequest, background_tasks: BackgroundTasks):
-    """Execute a task via ADK Swarm."""
+    """
+    Execute a task via ADK Swarm.
+    With "stream": true the response is NDJSON, one stream_swarm_task event per line.
+    """
     if tasks.status == "BUSY":
         raise HTTPException(status_code=400, detail="A task is already running.")
     
@@ -1050,17 +1081,37 @@ async def execute_task(request: TaskRequest, background_tasks: BackgroundTasks):
     
     tasks.status = "BUSY"
     tasks.active_task = request.task
-    
+
+    async def events():
+        try:
+            async for event in _stream_swarm_task(request.task, session_id=request.session_id,
+                                                  user_id=request.user_id, cache=request.cache):
+                if event["type"] == "final":
+                    tasks.last_result = event["text"]
+                yield event
+        finally:
+            tasks.status = "IDLE"
+            tasks.active_task = None
+
+    if request.stream:
+        async def ndjson():
+            try:
+                async for event in events():
+                    yield json.dumps(event) + "\n"
+            except Exception as e:
+                logger.error(f"Task failed: {e}")
+                yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
     try:
-        result = await _run_swarm_task(request.task)
-        tasks.last_result = result
+        result = ""
+        async for event in events():
+            if event["type"] == "final":
+                result = event["text"]
         return {"status": "SUCCESS", "result": str(result)}
     except Exception as e:
         logger.error(f"Task failed: {e}")
         return {"status": "FAILED", "error": str(e)}
-    finally:
-        tasks.status = "IDLE"
-        tasks.active_task = None
 
 # ============== VOICE (TTS) ==============
 
@@ -1070,7 +1121,7 @@ async def text_to_speech(text: str):
     Generate audio from text using Kokoro-ONNX.
     Returns: wav file as a stream.
     """
-    if Kokoro is None:
+    if not KOKORO_AVAILABLE:
         raise HTTPException(status_code=501, detail="Kokoro-ONNX not installed in backend")
     
     # Path to models (assumed mapped or downloaded)
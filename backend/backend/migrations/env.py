@@ -48,6 +48,7 @@ def include_object(object, name, type_, reflected, compare_to):
     if type_ == "table" and (
         name in ["sessions", "events", "app_states", "user_states", "adk_internal_metadata"]
         or name.startswith("adk_")
+        or name.startswith("nexus_bus_")
     ):
         return False
     return True
@@ -63,7 +63,8 @@ class ReflectionLoop:
                     # Call the manager agent to handle this specific item
                     result = await run_swarm_task(
                         f"I am the Reflection Loop. I found this unchecked item in task.md: '{next_task}'. "
-                        f"Please execute it and then mark it as completed in '{self.task_file}'."
+                        f"Please execute it and then mark it as completed in '{self.task_file}'.",
+                        session_id="reflection-loop"
                     )
                     
                     logger.info(f"🧠 Task execution result: {result[:50]}...")
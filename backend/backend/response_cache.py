@@ -0,0 +1,168 @@
+"""
+Swarm Response Cache
+Answers repeated tasks (status checks, greetings, repeated n8n queries,
+reflection retries) without a model round trip. Tasks match exactly on
+normalized text, or, when SWARM_CACHE_EMBED_MODEL is set, on embedding
+similarity above SWARM_CACHE_SIMILARITY. Entries are scoped per agent,
+model and user and expire after SWARM_CACHE_TTL seconds, least recently used
+first.
+"""
+import logging
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import httpx
+
+from .vram_manager import OLLAMA_BASE_URL
+
+logger = logging.getLogger("response_cache")
+
+CACHE_ENABLED = os.getenv("SWARM_RESPONSE_CACHE", "1") not in ("0", "false", "False")
+CACHE_TTL = float(os.getenv("SWARM_CACHE_TTL", "600"))  # seconds
+CACHE_MAX_ENTRIES = int(os.getenv("SWARM_CACHE_MAX_ENTRIES", "512"))
+# Ollama embedding model for near-duplicate lookups; empty keeps the cache exact-match only
+EMBED_MODEL = os.getenv("SWARM_CACHE_EMBED_MODEL", "")
+SIMILARITY_THRESHOLD = float(os.getenv("SWARM_CACHE_SIMILARITY", "0.95"))  # cosine
+
+
+def normalize(task: str) -> str:
+    """Case, whitespace and trailing punctuation do not change the answer."""
+    return re.sub(r"\s+", " ", task).strip().lower().rstrip(".!?")
+
+
+def cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class CacheEntry:
+    __slots__ = ("response", "expires_at", "vector")
+
+    def __init__(self, response: str, expires_at: float, vector: Optional[list[float]]):
+        self.response = response
+        self.expires_at = expires_at
+        self.vector = vector
+
+
+class ResponseCache:
+    """In-process LRU of responses, keyed by (scope, normalized task)."""
+
+    def __init__(self, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES,
+                 embed_model: str = EMBED_MODEL, similarity: float = SIMILARITY_THRESHOLD,
+                 enabled: bool = CACHE_ENABLED):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embed_model = embed_model
+        self.similarity = similarity
+        self.enabled = enabled
+        self._entries: OrderedDict[tuple[str, str], CacheEntry] = OrderedDict()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self.evictions = 0
+        self.embed_errors = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def _embed(self, text: str) -> Optional[list[float]]:
+        if not self.embed_model:
+            return None
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{OLLAMA_BASE_URL}/api/embed",
+                    json={"model": self.embed_model, "input": text, "keep_alive": "30m"},
+                    timeout=10.0
+                )
+                response.raise_for_status()
+                return response.json()["embeddings"][0]
+        except Exception as e:
+            # Fall back to exact matching rather than failing the task
+            self.embed_errors += 1
+            logger.warning(f"⚠️ Embedding lookup failed ({self.embed_model}): {e}")
+            return None
+
+    def _live(self, key: tuple[str, str], now: float) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at < now:
+            del self._entries[key]
+            return None
+        return entry
+
+    async def get(self, scope: str, task: str) -> Optional[str]:
+        """The cached response for a task in this scope, or None."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        key = (scope, normalize(task))
+        if self._live(key, now) is None:
+            key = await self._nearest(scope, key[1], now) if self.embed_model else None
+            if key is None:
+                self.misses += 1
+                return None
+            self.semantic_hits += 1
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key].response
+
+    async def _nearest(self, scope: str, text: str, now: float) -> Optional[tuple[str, str]]:
+        """Key of the most similar live entry in scope, if any clears the threshold."""
+        if not any(s == scope for s, _ in self._entries):
+            return None
+        vector = await self._embed(text)
+        if vector is None:
+            return None
+        best, best_score = None, self.similarity
+        for key, entry in list(self._entries.items()):
+            if key[0] != scope or entry.vector is None or entry.expires_at < now:
+                continue
+            score = cosine(vector, entry.vector)
+            if score >= best_score:
+                best, best_score = key, score
+        return best
+
+    async def put(self, scope: str, task: str, response: str):
+        if not self.enabled:
+            return
+        text = normalize(task)
+        vector = await self._embed(text) if self.embed_model else None
+        self._entries[(scope, text)] = CacheEntry(response, time.time() + self.ttl, vector)
+        self._entries.move_to_end((scope, text))
+        self.stores += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def bypass(self):
+        """Counts a lookup the caller skipped on purpose."""
+        self.bypassed += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "bypassed": self.bypassed,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "embed_model": self.embed_model or None,
+            "embed_errors": self.embed_errors,
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,195 @@
+"""
+Idempotent Swarm Results
+Tasks are keyed on their client-supplied idempotency_key, or their id. The
+first delivery of a key runs; duplicates either attach to the running
+execution or get the stored result back, so retries stop costing LLM runs.
+Results live in nexus_bus_results for SWARM_RESULT_TTL seconds.
+"""
+import json
+import logging
+import os
+import time
+from typing import Any, Optional
+
+import asyncpg
+
+from .nexus_bus import bus, BaseBus, PostgresBus
+from .task_queue import VISIBILITY_TIMEOUT
+
+logger = logging.getLogger("result_store")
+
+RESULT_TTL = int(os.getenv("SWARM_RESULT_TTL", "3600"))  # seconds a finished result is served to duplicates
+# A running key whose worker vanished becomes runnable again after this long
+RUN_LEASE = VISIBILITY_TIMEOUT
+PURGE_INTERVAL = 60  # seconds between opportunistic purges
+
+# Outcomes of ResultStore.begin()
+RUN = "run"            # first delivery: execute it
+ATTACHED = "attached"  # already running: the running execution will answer this caller too
+DONE = "done"          # already finished: here is the stored result
+
+
+def idempotency_key(message: dict) -> Optional[str]:
+    key = message.get("idempotency_key") or message.get("id")
+    return str(key) if key is not None else None
+
+
+def waiter_of(message: dict) -> dict:
+    """Where a caller expects its reply."""
+    return {"reply_to": message.get("reply_to", "swarm_results"), "id": message.get("id")}
+
+
+class ResultStore:
+    """Results table on the bus pool, or a process-local dict on the memory bus."""
+
+    def __init__(self, bus: BaseBus):
+        self.bus = bus
+        self._schema_ready = False
+        self._last_purge = 0.0
+        # key -> {"status", "result", "expires_at", "waiters"} when there is no database
+        self._local: dict[str, dict] = {}
+
+    @property
+    def persistent(self) -> bool:
+        return isinstance(self.bus, PostgresBus)
+
+    async def _pool(self):
+        if not self.bus.pool:
+            await self.bus.connect()
+        if not self._schema_ready:
+            await self._ensure_schema()
+        return self.bus.pool
+
+    async def _ensure_schema(self):
+        async with self.bus.pool.acquire() as conn:
+            try:
+                await conn.execute("""
+                    CREATE TABLE IF NOT EXISTS nexus_bus_results (
+                        key TEXT PRIMARY KEY,
+                        status TEXT NOT NULL,
+                        owner TEXT,
+                        result TEXT,
+                        waiters JSONB NOT NULL DEFAULT '[]',
+                        expires_at TIMESTAMPTZ NOT NULL,
+                        created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                    );
+                """)
+            except (asyncpg.exceptions.UniqueViolationError, asyncpg.exceptions.DuplicateTableError):
+                pass
+        self._schema_ready = True
+
+    async def begin(self, key: str, owner: str, waiter: Optional[dict]) -> tuple[str, Optional[dict]]:
+        """
+        Registers a delivery of `key`. Returns (RUN, None) for the first one,
+        (ATTACHED, None) while another delivery is running and (DONE, result)
+        once a result is stored. A running key's expiry doubles as its lease.
+        Without a `waiter`, ATTACHED only reports the running key; nobody is
+        attached to it.
+        """
+        if not self.persistent:
+            return self._begin_local(key, waiter)
+
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            while True:
+                won = await conn.fetchval("""
+                    INSERT INTO nexus_bus_results (key, status, owner, expires_at)
+                    VALUES ($1, 'running', $2, now() + make_interval(secs => $3))
+                    ON CONFLICT (key) DO UPDATE
+                        SET status = 'running', owner = EXCLUDED.owner, result = NULL,
+                            waiters = '[]', expires_at = EXCLUDED.expires_at
+                        WHERE nexus_bus_results.expires_at < now()
+                    RETURNING true
+                """, key, owner, float(RUN_LEASE))
+                if won:
+                    return RUN, None
+                row = await conn.fetchrow("SELECT status, result FROM nexus_bus_results WHERE key = $1", key)
+                if row is None:
+                    continue  # Released between the two statements
+                if row["status"] == "done":
+                    return DONE, json.loads(row["result"])
+                if waiter is None:
+                    return ATTACHED, None
+                attached = await conn.fetchval("""
+                    UPDATE nexus_bus_results SET waiters = waiters || $2::jsonb
+                    WHERE key = $1 AND status = 'running' RETURNING true
+                """, key, json.dumps([waiter]))
+                if attached:
+                    return ATTACHED, None
+
+    def _begin_local(self, key: str, waiter: Optional[dict]) -> tuple[str, Optional[dict]]:
+        entry = self._local.get(key)
+        if entry is None or entry["expires_at"] < time.time():
+            self._local[key] = {"status": "running", "result": None, "waiters": [],
+                                "expires_at": time.time() + RUN_LEASE}
+            return RUN, None
+        if entry["status"] == "done":
+            return DONE, dict(entry["result"])
+        if waiter is not None:
+            entry["waiters"].append(waiter)
+        return ATTACHED, None
+
+    async def complete(self, key: str, result: dict) -> list[dict]:
+        """Stores a result for RESULT_TTL seconds and returns the callers that attached meanwhile."""
+        if not self.persistent:
+            entry = self._local.get(key) or {"waiters": []}
+            self._local[key] = {"status": "done", "result": dict(result), "waiters": [],
+                                "expires_at": time.time() + RESULT_TTL}
+            self._purge_local()
+            return entry["waiters"]
+
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            waiters = await conn.fetchval("""
+                WITH old AS (SELECT waiters FROM nexus_bus_results WHERE key = $1 FOR UPDATE)
+                UPDATE nexus_bus_results r
+                SET status = 'done', result = $2, waiters = '[]',
+                    expires_at = now() + make_interval(secs => $3)
+                FROM old WHERE r.key = $1
+                RETURNING old.waiters
+            """, key, json.dumps(result), float(RESULT_TTL))
+            await self._purge(conn)
+        return json.loads(waiters) if waiters else []
+
+    async def release(self, key: str) -> list[dict]:
+        """Forgets a key that produced no reusable result (failure, expiry) and returns its waiters."""
+        if not self.persistent:
+            entry = self._local.pop(key, None)
+            return entry["waiters"] if entry else []
+
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            waiters = await conn.fetchval(
+                "DELETE FROM nexus_bus_results WHERE key = $1 AND status = 'running' RETURNING waiters", key
+            )
+        return json.loads(waiters) if waiters else []
+
+    async def renew(self, keys: list[str]):
+        """Extends the lease on keys that are still running here."""
+        if not self.persistent:
+            for key in keys:
+                entry = self._local.get(key)
+                if entry and entry["status"] == "running":
+                    entry["expires_at"] = time.time() + RUN_LEASE
+            return
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            await conn.execute("""
+                UPDATE nexus_bus_results SET expires_at = now() + make_interval(secs => $2)
+                WHERE key = ANY($1::text[]) AND status = 'running'
+            """, keys, float(RUN_LEASE))
+
+    async def _purge(self, conn: Any):
+        now = time.monotonic()
+        if now - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        await conn.execute("DELETE FROM nexus_bus_results WHERE status = 'done' AND expires_at < now()")
+
+    def _purge_local(self):
+        now = time.time()
+        for key in [k for k, e in self._local.items() if e["status"] == "done" and e["expires_at"] < now]:
+            del self._local[key]
+
+
+result_store = ResultStore(bus)
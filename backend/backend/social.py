@@ -1,7 +1,5 @@
 import os
 import logging
-import tweepy
-import requests
 import json
 from datetime import datetime
 from typing import Optional, Dict, Any
@@ -26,14 +24,23 @@ class SocialManager:
         self.discord_webhook_url = os.getenv("DISCORD_WEBHOOK_URL")
         self.discord_bot_token = os.getenv("DISCORD_BOT_TOKEN")
 
-        self.x_client = None
-        self._init_x_client()
+        self._x_client = None
+        self._x_client_ready = False
+
+    @property
+    def x_client(self):
+        """Tweepy client, created on first use so importing the agents stays fast."""
+        if not self._x_client_ready:
+            self._x_client_ready = True
+            self._init_x_client()
+        return self._x_client
 
     def _init_x_client(self):
         """Initialize Tweepy Client for X API v2."""
         if all([self.x_consumer_key, self.x_consumer_secret, self.x_access_token, self.x_access_token_secret]):
             try:
-                self.x_client = tweepy.Client(
+                import tweepy
+                self._x_client = tweepy.Client(
                     bearer_token=self.x_bearer_token,
                     consumer_key=self.x_consumer_key,
                     consumer_secret=self.x_consumer_secret,
@@ -70,6 +77,7 @@ class SocialManager:
         if embed: payload["embeds"] = [embed]
         
         try:
+            import requests
             resp = requests.post(self.discord_webhook_url, json=payload, timeout=10)
             resp.raise_for_status()
             logger.info("✅ Discord Webhook message sent.")
@@ -95,12 +103,24 @@ class SocialManager:
                 return True
         return False
 
-social_manager = SocialManager()
+_social_manager: Optional[SocialManager] = None
+
+def get_social_manager() -> SocialManager:
+    global _social_manager
+    if _social_manager is None:
+        _social_manager = SocialManager()
+    return _social_manager
+
+def __getattr__(name: str):
+    if name == "social_manager":
+        return get_social_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # --- ADK Tool Wrappers ---
 
 async def post_x_tweet(text: str):
     """Tool: Post a new update to X (Twitter)."""
+    social_manager = get_social_manager()
     if social_manager.scan_for_secrets(text):
         return "❌ SECURITY BLOCK: Potential private key detected in tweet."
     result = social_manager.post_to_x(text)
@@ -115,5 +135,5 @@ async def post_discord_alert(title: str, message: str, level: str = "info"):
         "color": colors.get(level.lower(), 3447003),
         "timestamp": datetime.utcnow().isoformat()
     }
-    result = social_manager.post_to_discord_webhook(embed=embed)
+    result = get_social_manager().post_to_discord_webhook(embed=embed)
     return "✅ Discord alert sent." if result["success"] else f"❌ Error: {result['error']}"
@@ -0,0 +1,178 @@
+"""
+Swarm Task Scheduler
+Pending swarm tasks wait in priority lanes between bus intake and execution.
+Higher lanes are always served first; a task's lane improves the longer it
+waits, so batch work still makes progress under sustained interactive load.
+Within a lane, tasks whose models are already warm may run ahead of one that
+would force a model load, for at most SWARM_AFFINITY_MAX_DELAY seconds.
+Tasks of a session that already has a task running stay in their lane
+until it is done.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque, OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger("swarm_scheduler")
+
+# Lane order is urgency order
+LANES = ("interactive", "normal", "batch")
+DEFAULT_LANE = "normal"
+# Seconds of waiting that promote a task by one lane
+AGING_INTERVAL = float(os.getenv("SWARM_PRIORITY_AGING", "30"))
+# Tasks taken off the bus ahead of execution. Kept small so other workers get the rest.
+PREFETCH = int(os.getenv("SWARM_PREFETCH", "8"))
+# Longest a task may be passed over in favour of tasks on already-loaded models
+AFFINITY_MAX_DELAY = float(os.getenv("SWARM_AFFINITY_MAX_DELAY", "20"))
+
+
+def lane_of(message: dict) -> str:
+    """Reads the lane from a task's 'priority' field (name or lane index), defaulting to normal."""
+    priority = message.get("priority")
+    if isinstance(priority, int) and 0 <= priority < len(LANES):
+        return LANES[priority]
+    if priority in LANES:
+        return priority
+    return DEFAULT_LANE
+
+
+class ScheduledTask:
+    """A task waiting for an executor, with whatever its intake needs to settle it (e.g. a queue claim)."""
+    def __init__(self, message: dict, lane: str, claim: Any = None, models: frozenset = frozenset(),
+                 session: Optional[Hashable] = None):
+        self.message = message
+        self.lane = lane
+        self.claim = claim
+        self.models = models  # predicted model set, empty when unknown
+        self.session = session  # tasks sharing a session never run at the same time
+        self.enqueued_at = time.monotonic()
+
+    def urgency(self, now: float, aging_interval: float) -> float:
+        """Lane index minus the lanes earned by waiting; lower runs first."""
+        return LANES.index(self.lane) - (now - self.enqueued_at) / aging_interval
+
+
+class PriorityScheduler:
+    """
+    FIFO lanes with aging. Only lane heads compete, since each is its lane's
+    oldest runnable task. With `predict_models`, the scheduler also tracks which
+    models recent tasks left loaded (up to `vram_capacity_gb`) and prefers
+    same-lane tasks that need nothing new. With `session_of`, a task is only
+    runnable while no other task of its session has been handed out and not
+    yet reported back through done().
+    """
+
+    def __init__(self, aging_interval: float = AGING_INTERVAL,
+                 predict_models: Optional[Callable[[dict], frozenset]] = None,
+                 model_size: Callable[[str], float] = lambda model: 1.0,
+                 vram_capacity_gb: float = 16.0,
+                 affinity_max_delay: float = AFFINITY_MAX_DELAY,
+                 session_of: Optional[Callable[[dict], Hashable]] = None):
+        self.aging_interval = aging_interval
+        self.predict_models = predict_models
+        self.model_size = model_size
+        self.vram_capacity_gb = vram_capacity_gb
+        self.affinity_max_delay = affinity_max_delay
+        self.session_of = session_of
+        self._busy: set = set()  # sessions with a task handed out
+        self._lanes: dict[str, deque] = {lane: deque() for lane in LANES}
+        self._cond = asyncio.Condition()
+        self._warm: OrderedDict = OrderedDict()  # model -> last used, least recent first
+        self.served = {lane: 0 for lane in LANES}
+        self.promoted = 0  # served ahead of a more urgent lane thanks to aging
+        self.model_loads = 0  # predicted loads of models that were not warm
+        self.swaps_avoided = 0  # times a warm task ran ahead of one that needed a load
+
+    def __len__(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def pending(self) -> list[ScheduledTask]:
+        """Tasks still waiting, in no particular order."""
+        return [task for lane in self._lanes.values() for task in lane]
+
+    async def put(self, message: dict, claim: Any = None, lane: Optional[str] = None):
+        models = self.predict_models(message) if self.predict_models else frozenset()
+        session = self.session_of(message) if self.session_of else None
+        task = ScheduledTask(message, lane or lane_of(message), claim, models, session)
+        async with self._cond:
+            self._lanes[task.lane].append(task)
+            self._cond.notify_all()
+
+    async def get(self) -> ScheduledTask:
+        """Waits for and removes the most urgent runnable task."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: any(self._runnable(t) for lane in self._lanes.values() for t in lane))
+            task = self._pop()
+            if task.session is not None:
+                self._busy.add(task.session)
+            self._cond.notify_all()
+            return task
+
+    async def done(self, task: ScheduledTask):
+        """Reports a task from get() as finished, so the next task of its session may run."""
+        if task.session is None:
+            return
+        async with self._cond:
+            self._busy.discard(task.session)
+            self._cond.notify_all()
+
+    def _runnable(self, task: ScheduledTask) -> bool:
+        return task.session is None or task.session not in self._busy
+
+    async def wait_for_room(self, limit: int = PREFETCH):
+        """Blocks intake while `limit` tasks are already pending."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: len(self) < limit)
+
+    def _pop(self) -> ScheduledTask:
+        now = time.monotonic()
+        heads = [head for head in (next((t for t in lane if self._runnable(t)), None)
+                                   for lane in self._lanes.values()) if head is not None]
+        task = min(heads, key=lambda t: (t.urgency(now, self.aging_interval), t.enqueued_at))
+        if any(LANES.index(other.lane) < LANES.index(task.lane) for other in heads):
+            self.promoted += 1
+        if not self._is_warm(task) and now - task.enqueued_at < self.affinity_max_delay:
+            warm = next((t for t in self._lanes[task.lane]
+                         if t.models and self._runnable(t) and self._is_warm(t)), None)
+            if warm is not None:
+                task = warm
+                self.swaps_avoided += 1
+        self._lanes[task.lane].remove(task)
+        self.served[task.lane] += 1
+        self._touch(task.models)
+        return task
+
+    def _is_warm(self, task: ScheduledTask) -> bool:
+        return all(model in self._warm for model in task.models)
+
+    def _touch(self, models: frozenset):
+        """Marks models as loaded, evicting the least recently used beyond the VRAM capacity."""
+        now = time.monotonic()
+        for model in models:
+            if model not in self._warm:
+                self.model_loads += 1
+            self._warm[model] = now
+            self._warm.move_to_end(model)
+        while sum(self.model_size(m) for m in self._warm) > self.vram_capacity_gb:
+            oldest = next(iter(self._warm))
+            if oldest in models:
+                break
+            del self._warm[oldest]
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "pending": {lane: len(tasks) for lane, tasks in self._lanes.items()},
+            "oldest_wait_s": {
+                lane: round(now - tasks[0].enqueued_at, 1) if tasks else 0.0
+                for lane, tasks in self._lanes.items()
+            },
+            "served": dict(self.served),
+            "promoted": self.promoted,
+            "busy_sessions": len(self._busy),
+            "warm_models": list(self._warm),
+            "model_loads": self.model_loads,
+            "swaps_avoided": self.swaps_avoided,
+        }
@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import asyncio
+import logging
+import argparse
+from typing import Optional
+
+# Ensure backend folder is in path for imports
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(backend_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("swarm_supervisor")
+
+# 🐝 SWARM SUPERVISOR
+# Runs N swarm_worker processes, each with its own event loop and bus
+# connection, restarts the ones that die and rolls their heartbeats up.
+# Workers share the 'swarm-workers' consumer group, so each task runs once.
+# Each child admits tasks against SWARM_VRAM_BUDGET_GB on its own. Admission
+# is not coordinated across children, which share one Ollama server: children
+# on the same model load it once, but children on different models can
+# together exceed the card. Multi-worker pools should route to one model or
+# set SWARM_CHILD_VRAM_BUDGET_GB (and SWARM_CONCURRENCY) conservatively.
+
+WORKERS = int(os.getenv("SWARM_WORKERS", "1"))
+RESTART_BASE_DELAY = 1.0  # seconds, doubled per crash in a row
+RESTART_MAX_DELAY = 60.0
+STABLE_AFTER = 60.0  # a child that ran this long resets its crash streak
+STOP_GRACE = 30.0  # seconds between SIGTERM and SIGKILL on shutdown
+STATS_INTERVAL = float(os.getenv("SWARM_SUPERVISOR_STATS_INTERVAL", "30"))
+
+
+class WorkerProcess:
+    """
+    One supervised worker slot. Each start gets a fresh worker id (slot plus
+    generation), so claims left by a crashed predecessor count as dead.
+    """
+    def __init__(self, slot: int, prefix: str):
+        self.slot = slot
+        self.prefix = prefix
+        self.generation = 0
+        self.worker_id = f"{prefix}-w{slot}"
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.crash_streak = 0
+        self.retired = False
+        self.task: Optional[asyncio.Task] = None
+
+
+class SwarmSupervisor:
+    def __init__(self, workers: int = WORKERS):
+        self.target = max(0, workers)
+        self.slots: dict[int, WorkerProcess] = {}
+        self._next_slot = 0
+        self._stopping = False
+        self._prefix = f"{socket.gethostname()}-{os.getpid()}"
+
+    def _child_env(self, worker: WorkerProcess) -> dict:
+        env = dict(os.environ, SWARM_WORKER_ID=worker.worker_id)
+        # Children inherit the worker budget unless a per-child one is set (see the note above)
+        if os.getenv("SWARM_CHILD_VRAM_BUDGET_GB"):
+            env["SWARM_VRAM_BUDGET_GB"] = os.environ["SWARM_CHILD_VRAM_BUDGET_GB"]
+        return env
+
+    async def _spawn(self, worker: WorkerProcess):
+        worker.generation += 1
+        worker.worker_id = f"{worker.prefix}-w{worker.slot}.{worker.generation}"
+        worker.proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "backend.swarm_worker",
+            cwd=parent_dir, env=self._child_env(worker),
+        )
+        worker.started_at = time.monotonic()
+        logger.info(f"🐣 Worker {worker.worker_id} started (pid {worker.proc.pid}).")
+
+    async def _watch(self, worker: WorkerProcess):
+        """Keeps one slot running until it is retired or the supervisor stops."""
+        while not self._stopping and not worker.retired:
+            await self._spawn(worker)
+            code = await worker.proc.wait()
+            if self._stopping or worker.retired:
+                break
+            ran_for = time.monotonic() - worker.started_at
+            worker.crash_streak = 0 if ran_for >= STABLE_AFTER else worker.crash_streak + 1
+            delay = min(RESTART_MAX_DELAY, RESTART_BASE_DELAY * (2 ** worker.crash_streak))
+            worker.restarts += 1
+            logger.error(f"💥 Worker {worker.worker_id} exited with code {code} after {ran_for:.0f}s. "
+                         f"Restarting in {delay:.0f}s (restart #{worker.restarts}).")
+            await self._reclaim(worker.worker_id)
+            await asyncio.sleep(delay)
+        self.slots.pop(worker.slot, None)
+
+    async def _reclaim(self, worker_id: str):
+        """
+        Hands a dead child's claims and result keys back right away instead of
+        after its heartbeat times out, then drops it from the registry.
+        """
+        from .worker_registry import worker_registry
+
+        try:
+            await worker_registry.reclaim_stuck(worker_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not reclaim tasks of worker {worker_id}: {e}")
+        try:
+            await worker_registry.deregister(worker_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not deregister worker {worker_id}: {e}")
+
+    async def scale(self, workers: int):
+        """Grows or shrinks the pool. Retired workers finish via SIGTERM like a normal shutdown."""
+        self.target = max(0, workers)
+        live = sorted(self.slots.values(), key=lambda w: w.slot)
+        for worker in live[self.target:]:
+            worker.retired = True
+            await self._terminate(worker)
+        for _ in range(self.target - len(live)):
+            slot = self._next_slot
+            self._next_slot += 1
+            worker = self.slots[slot] = WorkerProcess(slot, self._prefix)
+            worker.task = asyncio.create_task(self._watch(worker))
+        logger.info(f"⚖️ Worker pool scaled to {self.target}.")
+
+    async def _terminate(self, worker: WorkerProcess):
+        proc = worker.proc
+        if proc is None or proc.returncode is not None:
+            return
+        proc.terminate()
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=STOP_GRACE)
+        except asyncio.TimeoutError:
+            logger.warning(f"🔪 Worker {worker.worker_id} ignored SIGTERM. Killing it.")
+            proc.kill()
+            await proc.wait()
+
+    async def stop(self):
+        self._stopping = True
+        await asyncio.gather(*(self._terminate(w) for w in list(self.slots.values())))
+        for worker in list(self.slots.values()):
+            if worker.task is not None:
+                worker.task.cancel()
+
+    async def stats(self) -> dict:
+        """Process state of every slot, joined with the latest heartbeat of its worker."""
+        from .worker_registry import worker_registry
+
+        try:
+            beats = {w["worker_id"]: w for w in await worker_registry.live_workers()}
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read worker heartbeats: {e}")
+            beats = {}
+        workers = []
+        for worker in sorted(self.slots.values(), key=lambda w: w.slot):
+            beat = beats.get(worker.worker_id, {})
+            workers.append({
+                "worker_id": worker.worker_id,
+                "pid": worker.proc.pid if worker.proc else None,
+                "running": bool(worker.proc and worker.proc.returncode is None),
+                "restarts": worker.restarts,
+                "heartbeat": bool(beat),
+                "status": beat.get("status", "unknown"),
+                "in_flight": beat.get("in_flight", 0),
+                "queue_depth": beat.get("queue_depth", 0),
+            })
+        return {
+            "target": self.target,
+            "running": sum(w["running"] for w in workers),
+            "heartbeating": sum(w["heartbeat"] for w in workers),
+            "busy": sum(w["status"] == "busy" for w in workers),
+            "in_flight": sum(w["in_flight"] for w in workers),
+            "queue_depth": sum(w["queue_depth"] for w in workers),
+            "restarts": sum(w["restarts"] for w in workers),
+            "workers": workers,
+        }
+
+    async def run(self):
+        from .nexus_bus import bus, MemoryBus
+
+        if isinstance(bus, MemoryBus):
+            raise RuntimeError("The memory bus cannot reach worker processes. Use NEXUS_BUS_BACKEND=postgres.")
+
+        loop = asyncio.get_running_loop()
+        stopped = asyncio.Event()
+        loop.add_signal_handler(signal.SIGTERM, stopped.set)
+        loop.add_signal_handler(signal.SIGINT, stopped.set)
+        # SIGUSR1 / SIGUSR2 grow or shrink the pool by one
+        loop.add_signal_handler(signal.SIGUSR1, lambda: asyncio.ensure_future(self.scale(self.target + 1)))
+        loop.add_signal_handler(signal.SIGUSR2, lambda: asyncio.ensure_future(self.scale(self.target - 1)))
+
+        await self.scale(self.target)
+        try:
+            while not stopped.is_set():
+                try:
+                    await asyncio.wait_for(stopped.wait(), timeout=STATS_INTERVAL)
+                except asyncio.TimeoutError:
+                    stats = await self.stats()
+                    logger.info(f"📊 Swarm pool: {json.dumps({k: v for k, v in stats.items() if k != 'workers'})}")
+        finally:
+            logger.info("🛑 Stopping worker pool...")
+            await self.stop()
+            await bus.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run and supervise a pool of swarm worker processes.")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Worker processes to keep running")
+    args = parser.parse_args()
+    # We need to run this as a package: python3 -m backend.swarm_supervisor
+    asyncio.run(SwarmSupervisor(args.workers).run())
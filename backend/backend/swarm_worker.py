@@ -1,7 +1,10 @@
 import os
 import sys
+import socket
+import time
 import asyncio
 import logging
+from typing import Optional
 
 # Ensure backend folder is in path for imports
 backend_dir = os.path.dirname(os.path.abspath(__file__))
@@ -12,49 +15,406 @@ if parent_dir not in sys.path:
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("swarm_worker")
 
+WORKER_ID = os.getenv("SWARM_WORKER_ID", f"{socket.gethostname()}-{os.getpid()}")
+# Workers in the same group split swarm_tasks instead of each running every task
+WORKER_GROUP = os.getenv("SWARM_WORKER_GROUP", "swarm-workers")
+# Tasks executed at once; each is also admitted against the VRAM budget for its model
+CONCURRENCY = max(1, int(os.getenv("SWARM_CONCURRENCY", "1")))
+# Streamed text is sent in chunks of at most this much latency or size
+CHUNK_INTERVAL = float(os.getenv("SWARM_CHUNK_INTERVAL_MS", "50")) / 1000
+CHUNK_MAX_CHARS = int(os.getenv("SWARM_CHUNK_MAX_CHARS", "256"))
+
+# Live executor state, for status reporting
+in_flight: dict[str, dict] = {}
+_held: dict[str, object] = {}  # request id -> ScheduledTask, for lease renewal
+_scheduler = None
+_budget = None
+
+class ChunkPublisher:
+    """
+    Publishes a streaming task's text as ordered chunk messages on its reply
+    channel. Deltas are merged for up to CHUNK_INTERVAL seconds or
+    CHUNK_MAX_CHARS characters and sent from a background task, so the model
+    loop never waits on the bus.
+    """
+    def __init__(self, bus, msg: dict, interval: Optional[float] = None, max_chars: Optional[int] = None):
+        self.bus = bus
+        self.request_id = msg.get("id", "unknown")
+        self.reply_to = msg.get("reply_to", "swarm_results")
+        self.interval = CHUNK_INTERVAL if interval is None else interval
+        self.max_chars = CHUNK_MAX_CHARS if max_chars is None else max_chars
+        self.sent = 0
+        self._text: list[str] = []
+        self._size = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._outbox: list[dict] = []
+        self._sender: Optional[asyncio.Task] = None
+
+    def __call__(self, delta: str, **fields):
+        """Adds a text delta; extra fields (e.g. a tool call with an empty delta) go out as their own chunk."""
+        if fields:
+            self._cut()
+            self._queue(delta, fields)
+            return
+        self._text.append(delta)
+        self._size += len(delta)
+        if self._size >= self.max_chars:
+            self._cut()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.interval, self._cut)
+
+    def _cut(self):
+        """Turns the text gathered so far into one chunk."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._text:
+            text, self._text, self._size = "".join(self._text), [], 0
+            self._queue(text, {})
+
+    def _queue(self, delta: str, fields: dict):
+        from .nexus_bus import CHUNK, STREAMING_STATUS
+
+        seq, self.sent = self.sent, self.sent + 1
+        self._outbox.append({
+            "id": self.request_id,
+            "type": CHUNK,
+            "status": STREAMING_STATUS,
+            "seq": seq,
+            "delta": delta,
+            **fields,
+        })
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.create_task(self._send())
+
+    async def _send(self):
+        # Whatever queued up during a round trip goes out together in the next one
+        while self._outbox:
+            batch, self._outbox = self._outbox, []
+            try:
+                await self.bus.publish_many(self.reply_to, batch)
+            except Exception as e:
+                # The final result still carries the whole text
+                logger.warning(f"⚠️ [ID: {self.request_id}] Dropped {len(batch)} stream chunk(s): {e}")
+
+    async def close(self):
+        """Sends what is still buffered; `sent` is final afterwards."""
+        self._cut()
+        if self._sender is not None:
+            await self._sender
+
+async def execute_task(msg: dict) -> dict:
+    """
+    Runs one swarm task and returns the result message for swarm_results.
+    Tasks sent with "stream": true also get their text and tool calls published as chunks while it is generated.
+    """
+    from .agents import stream_swarm_task
+    from .nexus_bus import bus, is_expired, FINAL
+
+    task = msg.get("task")
+    request_id = msg.get("id", "unknown")
+    if is_expired(msg):
+        # Last check before the GPU: the caller has already given up
+        logger.warning(f"⌛ [ID: {request_id}] Deadline passed before execution. Skipping.")
+        return {"id": request_id, "status": "EXPIRED", "error": "deadline passed before execution"}
+    logger.info(f"📥 [ID: {request_id}] Received task: {task[:100]}...")
+
+    chunks = ChunkPublisher(bus, msg) if msg.get("stream") else None
+    try:
+        # Execute the task via ADK Swarm
+        async for event in stream_swarm_task(task, session_id=msg.get("session_id"), user_id=msg.get("user_id"),
+                                             cache=msg.get("cache", True)):
+            if event["type"] == "text" and chunks:
+                chunks(event["delta"])
+            elif event["type"] == "tool_call" and chunks:
+                chunks("", tool=event["name"], author=event["author"])
+            elif event["type"] == "final":
+                final = event
+        if chunks:
+            await chunks.close()
+        logger.info(f"✅ [ID: {request_id}] Task completed successfully "
+                    f"(ttft {final['ttft_s']}s, total {final['elapsed_s']}s{', cached' if final['cached'] else ''}).")
+        return {
+            "id": request_id,
+            "status": "SUCCESS",
+            "result": str(final["text"]),
+            "type": FINAL,
+            "seq": chunks.sent if chunks else 0,
+            "cached": final["cached"],
+            "ttft_s": final["ttft_s"],
+            "elapsed_s": final["elapsed_s"],
+        }
+    except Exception as e:
+        import traceback
+        logger.error(f"❌ [ID: {request_id}] Task failed: {e}")
+        logger.error(traceback.format_exc())
+        if chunks:
+            await chunks.close()
+        return {
+            "id": request_id,
+            "status": "FAILED",
+            "error": str(e),
+            "type": FINAL,
+            "seq": chunks.sent if chunks else 0,
+        }
+
+async def _notify_intake(bus, scheduler):
+    """Fire-and-forget mode: tasks arrive straight from LISTEN/NOTIFY."""
+    from .nexus_bus import GAP_MARKER
+
+    logger.info(f"📡 Listening for signals on channel: 'swarm_tasks' (group '{WORKER_GROUP}')...")
+
+    # One session's tasks stay on one worker, keeping its models and context warm.
+    # Group claims happen as the loop pulls, so waiting for room leaves tasks to idle workers.
+    async for msg in bus.subscribe("swarm_tasks", group=WORKER_GROUP, partition_key="session_id"):
+        if msg.get("_bus") == GAP_MARKER:
+            logger.error(f"🕳️ Tasks {msg['from_seq']}-{msg['to_seq']} were lost while the bus was down.")
+            continue
+        if not msg.get("task"):
+            continue
+        if await _admit(bus, msg):
+            await scheduler.put(msg)
+        await scheduler.wait_for_room()
+
+async def _durable_intake(bus, scheduler):
+    """Durable mode: tasks are claimed from nexus_bus_tasks and acked only once handled."""
+    from .task_queue import task_queue
+
+    async for claimed in task_queue.consume("swarm_tasks", WORKER_ID):
+        if not claimed.message.get("task"):
+            await task_queue.ack(claimed)
+            continue
+        # The claim itself waits out a running duplicate, so a dead run cannot take it along
+        admitted = await _admit(bus, claimed.message, attach=False)
+        if admitted is None:
+            await task_queue.defer(claimed, reason="duplicate of a running task")
+        elif admitted:
+            await scheduler.put(claimed.message, claim=claimed)
+        else:
+            await task_queue.ack(claimed)
+        await scheduler.wait_for_room()
+
+async def _admit(bus, msg: dict, attach: bool = True) -> Optional[bool]:
+    """
+    Idempotency check ahead of scheduling. False when the task is a duplicate:
+    either it is attached to the running execution or its stored result has been sent.
+    With `attach=False`, a duplicate of a running task is not attached and None is returned.
+    """
+    from .result_store import result_store, idempotency_key, waiter_of, RUN, DONE
+
+    key = idempotency_key(msg)
+    if key is None:
+        return True
+    try:
+        outcome, stored = await result_store.begin(key, WORKER_ID, waiter_of(msg) if attach else None)
+    except Exception as e:
+        # Running twice beats not running at all
+        logger.error(f"❌ [ID: {msg.get('id')}] Idempotency check failed, running anyway: {e}")
+        return True
+    if outcome == RUN:
+        return True
+    if outcome == DONE:
+        logger.info(f"♻️ [ID: {msg.get('id')}] Duplicate of finished task '{key}'. Sending stored result.")
+        await _reply(bus, [waiter_of(msg)], stored)
+    elif not attach:
+        logger.info(f"⏳ [ID: {msg.get('id')}] Duplicate of running task '{key}'. Checking again later.")
+        return None
+    else:
+        logger.info(f"🔗 [ID: {msg.get('id')}] Duplicate of running task '{key}'. Attached to it.")
+    return False
+
+async def _reply(bus, waiters: list[dict], reply: dict):
+    """Sends a result to every distinct caller, each under its own request id."""
+    seen = set()
+    for waiter in waiters:
+        target = (waiter["reply_to"], waiter["id"])
+        if target in seen:
+            continue
+        seen.add(target)
+        await bus.batched().publish(waiter["reply_to"], dict(reply, id=waiter["id"]))
+
+async def _settle(bus, msg: dict, reply: dict, claimed=None):
+    """Publishes the outcome of one task and, in durable mode, acks or nacks its claim."""
+    from .task_queue import task_queue
+    from .result_store import result_store, idempotency_key, waiter_of
+
+    key = idempotency_key(msg)
+    waiters = []
+    if key is not None:
+        # Only successes are worth replaying; anything else may run again
+        if reply["status"] == "SUCCESS":
+            waiters = await result_store.complete(key, reply)
+        else:
+            waiters = await result_store.release(key)
+
+    if reply["status"] == "EXPIRED":
+        if claimed is not None:
+            await task_queue.expire(claimed)
+        else:
+            await bus.expire("swarm_tasks", msg)
+        if waiters:
+            # Duplicates that attached would otherwise wait out their own timeout
+            await _reply(bus, waiters, reply)
+        return
+    if claimed is not None:
+        if reply["status"] == "SUCCESS":
+            await task_queue.ack(claimed)
+        else:
+            await task_queue.nack(claimed, error=reply["error"])
+            if not claimed.is_last_attempt:
+                # A retry is coming, so callers only hear about the final outcome
+                return
+    # Publish result back, to duplicates that attached meanwhile as well
+    await _reply(bus, [waiter_of(msg)] + waiters, reply)
+
+def _session_of(message: dict) -> Optional[tuple[str, str]]:
+    """
+    The conversation a task appends to, or None for one-off tasks without a
+    session_id (trigger_mission, n8n, plain bus callers), which run concurrently.
+    """
+    if not message.get("session_id"):
+        return None
+    return str(message.get("user_id") or ""), str(message["session_id"])
+
+async def _run(bus, scheduler, item, budget, slots: asyncio.Semaphore):
+    """
+    Runs one task once every model it is predicted to load fits the VRAM
+    budget, then frees its slot, its models and its session.
+    """
+    from .vram_manager import vram_manager
+
+    request_id = str(item.message.get("id", "unknown"))
+    models = None
+    try:
+        models = sorted(item.models) or [vram_manager.route_task(item.message["task"])]
+        await budget.acquire(*models)
+        in_flight[request_id] = {"models": models, "lane": item.lane, "started_at": time.time()}
+        logger.info(f"🚦 [ID: {request_id}] Starting {item.lane} task on {', '.join(models)} "
+                    f"({len(in_flight)}/{CONCURRENCY} in flight, {len(scheduler)} pending).")
+        reply = await execute_task(item.message)
+        await _settle(bus, item.message, reply, item.claim)
+    except Exception as e:
+        logger.error(f"❌ [ID: {request_id}] Could not settle task: {e}")
+    finally:
+        in_flight.pop(request_id, None)
+        _held.pop(request_id, None)
+        if models is not None:
+            await budget.release(*models)
+        slots.release()
+        await scheduler.done(item)
+
+async def _executor(bus, scheduler, budget):
+    """
+    Starts scheduled tasks, most urgent lane first, up to CONCURRENCY at once.
+    The next task waits for VRAM rather than being skipped, so lanes stay in order.
+    Tasks of one session run one after another, since each turn extends the
+    history the next one reads; the scheduler keeps them queued meanwhile, so
+    they still count toward the prefetch limit and keep their lane.
+    """
+    slots = asyncio.Semaphore(CONCURRENCY)
+    running: set[asyncio.Task] = set()
+    while True:
+        await slots.acquire()
+        item = await scheduler.get()
+        _held[str(item.message.get("id", "unknown"))] = item
+        task = asyncio.create_task(_run(bus, scheduler, item, budget, slots))
+        running.add(task)
+        task.add_done_callback(running.discard)
+
+def worker_stats() -> dict:
+    """In-flight tasks plus scheduler, VRAM budget and response cache state."""
+    from .response_cache import response_cache
+
+    stats = {
+        "worker_id": WORKER_ID,
+        "concurrency": CONCURRENCY,
+        "in_flight": len(in_flight),
+        "tasks": {rid: dict(info) for rid, info in in_flight.items()},
+    }
+    if _scheduler is not None:
+        stats["scheduler"] = _scheduler.stats()
+    if _budget is not None:
+        stats["vram"] = _budget.stats()
+    stats["response_cache"] = response_cache.stats()
+    return stats
+
+def _heartbeat_info() -> dict:
+    from .vram_manager import vram_manager
+
+    info = worker_stats()
+    info.update({
+        "status": "busy" if in_flight else "idle",
+        "host": socket.gethostname(),
+        "pid": os.getpid(),
+        "queue_depth": len(_scheduler) if _scheduler is not None else 0,
+        "loaded_models": list(vram_manager.current_loaded_models),
+    })
+    return info
+
+async def _heartbeat_loop():
+    """
+    Announces this worker, renews leases on what it is running or has queued
+    and reclaims tasks and result keys from workers that stopped heartbeating.
+    Tasks past MAX_TASK_RUNTIME lose their lease so a hung inference gets retried.
+    """
+    from .worker_registry import worker_registry, HEARTBEAT_INTERVAL, MAX_TASK_RUNTIME
+    from .task_queue import task_queue
+    from .result_store import result_store, idempotency_key
+
+    while True:
+        try:
+            await worker_registry.heartbeat(_heartbeat_info())
+            now = time.time()
+            live = [item for rid, item in list(_held.items())
+                    if now - in_flight.get(rid, {}).get("started_at", now) < MAX_TASK_RUNTIME]
+            if _scheduler is not None:
+                # Prefetched claims can wait longer than a lease while earlier tasks run
+                live += _scheduler.pending()
+            for item in live:
+                if item.claim is not None:
+                    await task_queue.renew(item.claim)
+            keys = [key for key in (idempotency_key(item.message) for item in live) if key]
+            if keys:
+                await result_store.renew(keys)
+            if worker_registry.persistent:
+                # Notify mode has no task leases, but dead workers' result keys still need releasing
+                await worker_registry.reclaim_stuck()
+        except Exception as e:
+            logger.warning(f"⚠️ Heartbeat failed: {e}")
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+
 async def worker_loop():
+    global _scheduler, _budget
     logger.info("🐝 Nexus Swarm Worker (Omni-Beast) initializing...")
-    
+
     # Defer imports until loop is running
     from .nexus_bus import bus
-    from .agents import run_swarm_task, vram_manager
-    
+    from .vram_manager import vram_manager, VRAMBudget, model_vram_gb
+    from .task_queue import task_queue
+    from .swarm_scheduler import PriorityScheduler
+    from .worker_registry import worker_registry
+
     # Start loop-local monitoring
     vram_manager.start_monitoring()
-    
-    logger.info("📡 Listening for signals on channel: 'swarm_tasks'...")
-    
-    async for msg in bus.subscribe("swarm_tasks"):
-        task = msg.get("task")
-        request_id = msg.get("id", "unknown")
-        
-        if not task:
-            continue
-            
-        logger.info(f"📥 [ID: {request_id}] Received task: {task[:100]}...")
-        
+
+    budget = _budget = VRAMBudget()
+    # Tasks on models that are already loaded go first within their lane
+    scheduler = _scheduler = PriorityScheduler(
+        predict_models=lambda msg: vram_manager.predict_models(msg["task"]),
+        model_size=model_vram_gb,
+        vram_capacity_gb=budget.capacity_gb,
+        session_of=_session_of,
+    )
+    logger.info(f"⚙️ Running up to {CONCURRENCY} task(s) at once within {budget.capacity_gb} GB of VRAM.")
+
+    intake = _durable_intake(bus, scheduler) if task_queue.durable else _notify_intake(bus, scheduler)
+    try:
+        await asyncio.gather(intake, _executor(bus, scheduler, budget), _heartbeat_loop())
+    finally:
         try:
-            # Execute the task via ADK Swarm
-            result = await run_swarm_task(task)
-            
-            logger.info(f"✅ [ID: {request_id}] Task completed successfully.")
-            
-            # Publish result back
-            await bus.publish("swarm_results", {
-                "id": request_id,
-                "status": "SUCCESS",
-                "result": str(result)
-            })
-            
+            await worker_registry.deregister(WORKER_ID)
         except Exception as e:
-            import traceback
-            logger.error(f"❌ [ID: {request_id}] Task failed: {e}")
-            logger.error(traceback.format_exc())
-            await bus.publish("swarm_results", {
-                "id": request_id,
-                "status": "FAILED",
-                "error": str(e)
-            })
+            logger.warning(f"⚠️ Could not deregister worker: {e}")
 
 if __name__ == "__main__":
     try:
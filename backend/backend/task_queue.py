@@ -0,0 +1,242 @@
+"""
+Durable Task Queue for the Swarm Bus
+Tasks are rows in nexus_bus_tasks, claimed with SELECT ... FOR UPDATE SKIP LOCKED.
+NOTIFY is only a wake-up hint, so nothing is lost while no worker is listening.
+"""
+import asyncio
+import json
+import logging
+import os
+import asyncpg
+from typing import Optional, AsyncGenerator
+
+from .nexus_bus import bus, BaseBus, PostgresBus, is_expired, with_deadline
+from .swarm_scheduler import LANES, AGING_INTERVAL, lane_of
+
+logger = logging.getLogger("task_queue")
+
+# "notify" = fire-and-forget LISTEN/NOTIFY, "durable" = this table-backed queue
+QUEUE_MODE = os.getenv("SWARM_QUEUE_MODE", "notify")
+VISIBILITY_TIMEOUT = int(os.getenv("SWARM_QUEUE_VISIBILITY_TIMEOUT", "900"))  # LLM tasks run for minutes
+MAX_ATTEMPTS = int(os.getenv("SWARM_QUEUE_MAX_ATTEMPTS", "3"))
+RETRY_DELAY = int(os.getenv("SWARM_QUEUE_RETRY_DELAY", "10"))
+POLL_INTERVAL = 5.0  # Fallback poll in case a wake-up hint is missed
+
+
+def wake_channel(queue: str) -> str:
+    """Channel carrying the wake-up hint for a queue."""
+    return f"{queue}_ready"
+
+
+class ClaimedTask:
+    """A task row a worker currently holds. Must be acked or nacked."""
+    def __init__(self, id: int, queue: str, message: dict, attempts: int, max_attempts: int,
+                 claimed_by: Optional[str] = None):
+        self.id = id
+        self.queue = queue
+        self.message = message
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.claimed_by = claimed_by
+
+    @property
+    def is_last_attempt(self) -> bool:
+        return self.attempts >= self.max_attempts
+
+
+class TaskQueue:
+    """At-least-once task queue on top of the bus connection pool."""
+
+    def __init__(self, bus: BaseBus):
+        self.bus = bus
+        self._schema_ready = False
+        if QUEUE_MODE == "durable" and not self.durable:
+            logger.warning("⚠️ Durable queue needs the Postgres bus. Falling back to notify mode.")
+
+    @property
+    def durable(self) -> bool:
+        """True when tasks go through the table rather than plain NOTIFY."""
+        return QUEUE_MODE == "durable" and isinstance(self.bus, PostgresBus)
+
+    async def _pool(self):
+        if not self.bus.pool:
+            await self.bus.connect()
+        if not self._schema_ready:
+            await self._ensure_schema()
+        return self.bus.pool
+
+    async def _ensure_schema(self):
+        async with self.bus.pool.acquire() as conn:
+            try:
+                await conn.execute("""
+                    CREATE TABLE IF NOT EXISTS nexus_bus_tasks (
+                        id BIGSERIAL PRIMARY KEY,
+                        queue TEXT NOT NULL,
+                        message TEXT NOT NULL,
+                        status TEXT NOT NULL DEFAULT 'pending',
+                        attempts INT NOT NULL DEFAULT 0,
+                        max_attempts INT NOT NULL,
+                        visible_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                        claimed_by TEXT,
+                        last_error TEXT,
+                        created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                    );
+                    CREATE INDEX IF NOT EXISTS nexus_bus_tasks_ready
+                        ON nexus_bus_tasks (queue, visible_at) WHERE status = 'pending';
+                    ALTER TABLE nexus_bus_tasks ADD COLUMN IF NOT EXISTS priority INT NOT NULL DEFAULT 1;
+                """)
+            except (asyncpg.exceptions.UniqueViolationError, asyncpg.exceptions.DuplicateTableError):
+                pass
+        self._schema_ready = True
+
+    async def enqueue(self, queue: str, message: dict, max_attempts: int = MAX_ATTEMPTS) -> int:
+        """Stores a task and sends the wake-up hint in the same round trip."""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow("""
+                WITH t AS (
+                    INSERT INTO nexus_bus_tasks (queue, message, max_attempts, priority)
+                    VALUES ($1, $2, $3, $5) RETURNING id
+                )
+                SELECT t.id, pg_notify($4, 'j' || t.id::text) FROM t
+            """, queue, json.dumps(message), max_attempts, wake_channel(queue), LANES.index(lane_of(message)))
+        task_id = row["id"]
+        logger.info(f"📥 Queued task {task_id} on {queue}")
+        return task_id
+
+    async def claim(self, queue: str, worker_id: str, visibility_timeout: int = VISIBILITY_TIMEOUT) -> Optional[ClaimedTask]:
+        """
+        Claims the most urgent visible task: lowest priority lane, aged by
+        time waited as in the in-process scheduler. The claim stays hidden from
+        other workers for visibility_timeout seconds, after which it is retried.
+        """
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            while True:
+                row = await conn.fetchrow("""
+                    UPDATE nexus_bus_tasks
+                    SET attempts = attempts + 1,
+                        claimed_by = $2,
+                        visible_at = now() + make_interval(secs => $3)
+                    WHERE id = (
+                        SELECT id FROM nexus_bus_tasks
+                        WHERE queue = $1 AND status = 'pending' AND visible_at <= now()
+                        ORDER BY priority - EXTRACT(EPOCH FROM now() - created_at) / $4, id
+                        FOR UPDATE SKIP LOCKED
+                        LIMIT 1
+                    )
+                    RETURNING id, message, attempts, max_attempts
+                """, queue, worker_id, float(visibility_timeout), AGING_INTERVAL)
+                if row is None:
+                    return None
+                if row["attempts"] > row["max_attempts"]:
+                    # Previous holder died on its final attempt
+                    await conn.execute(
+                        "UPDATE nexus_bus_tasks SET status = 'dead', last_error = $2 WHERE id = $1",
+                        row["id"], "visibility timeout on final attempt"
+                    )
+                    logger.error(f"☠️ Task {row['id']} exhausted its attempts. Moved to dead letters.")
+                    continue
+                return ClaimedTask(row["id"], queue, json.loads(row["message"]), row["attempts"], row["max_attempts"],
+                                   claimed_by=worker_id)
+
+    async def renew(self, task: ClaimedTask, visibility_timeout: int = VISIBILITY_TIMEOUT) -> bool:
+        """Extends a claim's lease. False when the claim was reclaimed by someone else."""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            renewed = await conn.fetchval("""
+                UPDATE nexus_bus_tasks SET visible_at = now() + make_interval(secs => $3)
+                WHERE id = $1 AND claimed_by = $2 AND status = 'pending'
+                RETURNING true
+            """, task.id, task.claimed_by, float(visibility_timeout))
+        if not renewed:
+            logger.warning(f"⚠️ Lease on task {task.id} was lost; another worker may retry it.")
+        return bool(renewed)
+
+    async def ack(self, task: ClaimedTask):
+        """Marks a task as done by removing it."""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            await conn.execute("DELETE FROM nexus_bus_tasks WHERE id = $1", task.id)
+
+    async def nack(self, task: ClaimedTask, error: str = "", retry_delay: int = RETRY_DELAY):
+        """Releases a failed task for retry, or dead-letters it after the last attempt."""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            if task.is_last_attempt:
+                await conn.execute(
+                    "UPDATE nexus_bus_tasks SET status = 'dead', claimed_by = NULL, last_error = $2 WHERE id = $1",
+                    task.id, error
+                )
+                logger.error(f"☠️ Task {task.id} failed {task.attempts} times. Moved to dead letters.")
+            else:
+                await conn.execute("""
+                    UPDATE nexus_bus_tasks
+                    SET claimed_by = NULL, last_error = $2,
+                        visible_at = now() + make_interval(secs => $3)
+                    WHERE id = $1
+                """, task.id, error, float(retry_delay))
+                logger.warning(f"🔁 Task {task.id} will be retried in {retry_delay}s (attempt {task.attempts}/{task.max_attempts}).")
+
+    async def defer(self, task: ClaimedTask, reason: str = "", delay: int = RETRY_DELAY):
+        """Hands a claim back for later without spending one of its attempts."""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            await conn.execute("""
+                UPDATE nexus_bus_tasks
+                SET claimed_by = NULL, last_error = $3, attempts = GREATEST(attempts - 1, 0),
+                    visible_at = now() + make_interval(secs => $4)
+                WHERE id = $1 AND claimed_by = $2 AND status = 'pending'
+            """, task.id, task.claimed_by, reason, float(delay))
+
+    async def expire(self, task: ClaimedTask):
+        """Parks a task whose deadline passed before a worker got to it."""
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            await conn.execute(
+                "UPDATE nexus_bus_tasks SET status = 'expired', claimed_by = NULL, last_error = $2 WHERE id = $1",
+                task.id, "deadline passed before execution"
+            )
+        await self.bus.expire(task.queue, task.message)
+
+    async def consume(self, queue: str, worker_id: str) -> AsyncGenerator[ClaimedTask, None]:
+        """
+        Yields claimed tasks forever. Sleeps on the wake-up hint when the queue
+        is empty, with a slow poll as a safety net. Tasks past their deadline
+        are parked as expired instead of being yielded.
+        """
+        wake = asyncio.Event()
+
+        async def listen():
+            async for _ in self.bus.subscribe(wake_channel(queue)):
+                wake.set()
+
+        listener = asyncio.create_task(listen())
+        logger.info(f"📡 Consuming durable queue: {queue} as {worker_id}")
+        try:
+            while True:
+                wake.clear()
+                task = await self.claim(queue, worker_id)
+                if task is not None:
+                    if is_expired(task.message):
+                        await self.expire(task)
+                    else:
+                        yield task
+                    continue
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            listener.cancel()
+
+    async def submit(self, queue: str, message: dict, ttl: Optional[float] = None):
+        """Producer entry point: enqueues durably or publishes, depending on SWARM_QUEUE_MODE."""
+        message = with_deadline(message, ttl)
+        if self.durable:
+            await self.enqueue(queue, message)
+        else:
+            await self.bus.publish(queue, message)
+
+
+task_queue = TaskQueue(bus)
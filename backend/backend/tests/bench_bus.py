@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from nexus_bus import MemoryBus, PostgresBus, POSTGRES_URL
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("bench_bus")
+
+# Keep benchmark chatter out of the bus logs
+logging.getLogger("nexus_bus").setLevel(logging.WARNING)
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def make_bus(backend: str, dsn: str):
+    if backend == "memory":
+        return MemoryBus()
+    return PostgresBus(dsn)
+
+
+async def run_scenario(backend: str, dsn: str, payload_size: int, subscribers: int,
+                       publishers: int, channels: int, messages: int, timeout: float,
+                       batched: bool) -> dict:
+    """
+    One sweep point: `subscribers` listeners on each of `channels` channels,
+    `publishers` concurrent tasks sending `messages` in total, round-robin over channels.
+    """
+    bus = make_bus(backend, dsn)
+    channel_names = [f"bench_{os.getpid()}_{i}" for i in range(channels)]
+    expected_per_sub = {name: len(range(i, messages, channels)) for i, name in enumerate(channel_names)}
+    total_expected = sum(expected_per_sub[name] * subscribers for name in channel_names)
+
+    received = 0
+    latencies: list[float] = []
+    done = asyncio.Event()
+    peak_connections: dict = {}
+
+    async def listener(channel: str):
+        nonlocal received
+        remaining = expected_per_sub[channel]
+        if remaining == 0:
+            return
+        async for msg in bus.subscribe(channel):
+            received += 1
+            latencies.append(time.time() - msg["ts"])
+            if received >= total_expected:
+                done.set()
+            remaining -= 1
+            if remaining == 0:
+                break
+
+    listeners = [asyncio.create_task(listener(name)) for name in channel_names for _ in range(subscribers)]
+
+    # Wait until every subscriber is registered with the bus
+    wanted = sum(1 for name in channel_names if expected_per_sub[name]) * subscribers
+    setup_start = time.perf_counter()
+    while len(bus.subscriber_stats()) < wanted:
+        await asyncio.sleep(0.01)
+        if time.perf_counter() - setup_start > timeout:
+            raise RuntimeError("Subscribers did not come online in time")
+    setup_time = time.perf_counter() - setup_start
+
+    padding = "x" * payload_size
+    send = bus.batched().publish if batched else bus.publish
+
+    async def publisher(offset: int):
+        for seq in range(offset, messages, publishers):
+            channel = channel_names[seq % channels]
+            await send(channel, {"seq": seq, "ts": time.time(), "pad": padding})
+
+    start = time.perf_counter()
+    await asyncio.gather(*[publisher(i) for i in range(publishers)])
+    publish_time = time.perf_counter() - start
+    peak_connections = bus.connection_stats()
+
+    try:
+        await asyncio.wait_for(done.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.error(f"🛑 Scenario timed out with {received}/{total_expected} receptions.")
+    elapsed = time.perf_counter() - start
+
+    for task in listeners:
+        task.cancel()
+    await asyncio.gather(*listeners, return_exceptions=True)
+    await bus.close()
+
+    latencies.sort()
+    return {
+        "backend": backend,
+        "payload_size": payload_size,
+        "subscribers": subscribers,
+        "publishers": publishers,
+        "channels": channels,
+        "messages": messages,
+        "batched": batched,
+        "expected": total_expected,
+        "received": received,
+        "loss_rate": round(1 - received / total_expected, 6) if total_expected else 0.0,
+        "publish_rate": round(messages / publish_time, 1) if publish_time else 0.0,
+        "delivery_rate": round(received / elapsed, 1) if elapsed else 0.0,
+        "setup_ms": round(setup_time * 1000, 3),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+        "connections": peak_connections,
+    }
+
+
+def int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Swarm Bus benchmark sweep (JSON lines output).")
+    parser.add_argument("--backend", choices=["postgres", "memory"], default="memory")
+    parser.add_argument("--dsn", default=POSTGRES_URL.replace("postgresql+asyncpg://", "postgresql://"),
+                        help="Postgres DSN, e.g. a throwaway local container")
+    parser.add_argument("--payload-sizes", type=int_list, default=[64, 1024, 7000, 32000])
+    parser.add_argument("--subscribers", type=int_list, default=[1, 10])
+    parser.add_argument("--publishers", type=int_list, default=[1, 8])
+    parser.add_argument("--channels", type=int_list, default=[1, 4])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--batched", action="store_true", help="Publish through bus.batched()")
+    parser.add_argument("--output", help="Append results to this JSONL file as well as stdout")
+    args = parser.parse_args()
+
+    run_meta = {
+        "run_at": datetime.now(timezone.utc).isoformat(),
+        "host": platform.node(),
+        "python": platform.python_version(),
+    }
+    sweep = itertools.product(args.payload_sizes, args.subscribers, args.publishers, args.channels)
+    out = open(args.output, "a") if args.output else None
+    try:
+        for payload_size, subscribers, publishers, channels in sweep:
+            result = await run_scenario(args.backend, args.dsn, payload_size, subscribers,
+                                        publishers, channels, args.messages, args.timeout, args.batched)
+            result.update(run_meta)
+            line = json.dumps(result)
+            print(line, flush=True)
+            if out:
+                out.write(line + "\n")
+            logger.info(
+                f"📊 size={payload_size} subs={subscribers} pubs={publishers} chans={channels} "
+                f"→ {result['delivery_rate']}/s p99={result['latency_ms']['p99']}ms loss={result['loss_rate']:.2%}"
+            )
+    finally:
+        if out:
+            out.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("profile_imports")
+
+# Directory holding the `backend` package, so entry points import as they do in the containers
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENTRY_POINTS = ["backend.main", "backend.swarm_worker", "backend.swarm_supervisor", "backend.agents"]
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Rows of `python -X importtime` output: module, self and cumulative time (ms)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return rows
+
+
+def profile(module: str, top: int) -> dict:
+    """Imports `module` in a fresh interpreter and reports wall time plus the slowest imports."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PACKAGE_ROOT, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    rows = parse_importtime(proc.stderr)
+    error = None
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}"
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "error": error,
+        "wall_ms": round(wall * 1000, 1),
+        "import_ms": round(max((r["cumulative_ms"] for r in rows if r["module"] == module), default=0.0), 1),
+        "modules_loaded": len(rows),
+        # Slowest imports by cumulative time; a module's time includes what it imports
+        "slowest": [
+            {"module": r["module"], "cumulative_ms": round(r["cumulative_ms"], 1), "self_ms": round(r["self_ms"], 1)}
+            for r in sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True)
+            if r["module"] != module
+        ][:top],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold import-time profile of the backend entry points (JSON lines output).")
+    parser.add_argument("--modules", default=",".join(ENTRY_POINTS), help="Comma-separated modules to import")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per module; the fastest is reported")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports listed per module")
+    parser.add_argument("--output", help="Append results to this JSONL file as well as stdout")
+    args = parser.parse_args()
+
+    run_meta = {
+        "run_at": datetime.now(timezone.utc).isoformat(),
+        "host": platform.node(),
+        "python": platform.python_version(),
+    }
+    out = open(args.output, "a") if args.output else None
+    try:
+        for module in [m for m in args.modules.split(",") if m]:
+            # The first run also warms the bytecode cache; keep the fastest
+            result = min((profile(module, args.top) for _ in range(max(1, args.repeat))), key=lambda r: r["wall_ms"])
+            result.update(run_meta)
+            line = json.dumps(result)
+            print(line, flush=True)
+            if out:
+                out.write(line + "\n")
+            if result["ok"]:
+                slowest = ", ".join(f"{r['module']} {r['cumulative_ms']}ms" for r in result["slowest"][:3])
+                logger.info(f"⏱️ {module}: {result['wall_ms']}ms wall, {result['import_ms']}ms import "
+                            f"({result['modules_loaded']} modules). Slowest: {slowest}")
+            else:
+                logger.error(f"🛑 {module} failed to import: {result['error']}")
+    finally:
+        if out:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.sessions import InMemorySessionService
+from google.genai.types import Content, FunctionCall, FunctionResponse, Part
+
+from backend import agents, pg_session_service
+from backend.response_cache import ResponseCache
+
+MODEL = "qwen3:8b"
+
+
+def event(*parts: Part, partial: bool = False, author: str = "Nexus") -> SimpleNamespace:
+    return SimpleNamespace(content=Content(role="model", parts=list(parts)), partial=partial, author=author)
+
+
+def text(value: str, partial: bool = False) -> SimpleNamespace:
+    return event(Part(text=value), partial=partial)
+
+
+def tool_call(partial: bool = False) -> SimpleNamespace:
+    return event(Part(function_call=FunctionCall(name="read_file", args={"path": "notes.md"})), partial=partial)
+
+
+class FakeRunner:
+    """Replays canned ADK events, like a Runner in SSE mode."""
+    def __init__(self, events: list):
+        self.events = events
+        self.runs = 0
+
+    async def run_async(self, **kwargs):
+        self.runs += 1
+        for e in self.events:
+            yield e
+
+
+class StubRunners:
+    def __init__(self, runner: FakeRunner):
+        self._runner = runner
+
+    def scope(self, target_model: str, user_id=None) -> str:
+        return f"Nexus/{target_model}/test/{user_id or '-'}"
+
+    def runner(self, target_model: str) -> FakeRunner:
+        return self._runner
+
+
+@pytest.fixture
+def swarm(monkeypatch):
+    """Points stream_swarm_task at a fake runner, an in-memory session store and a fresh cache."""
+    async def prepare_for_task(task):
+        return MODEL
+
+    def install(events: list) -> FakeRunner:
+        runner = FakeRunner(events)
+        monkeypatch.setattr(agents, "runner_cache", StubRunners(runner))
+        monkeypatch.setattr(agents, "response_cache",
+                            ResponseCache(ttl=60, max_entries=8, embed_model="", enabled=True))
+        monkeypatch.setattr(agents.vram_manager, "route_task", lambda task: MODEL)
+        monkeypatch.setattr(agents.vram_manager, "prepare_for_task", prepare_for_task)
+        sessions = InMemorySessionService()
+        monkeypatch.setattr(pg_session_service, "get_session_service", lambda: sessions)
+        return runner
+
+    return install
+
+
+def collect(run, task: str, **kwargs) -> list[dict]:
+    async def scenario():
+        return [e async for e in agents.stream_swarm_task(task, **kwargs)]
+    return run(scenario())
+
+
+def deltas(events: list[dict]) -> list[str]:
+    return [e["delta"] for e in events if e["type"] == "text"]
+
+
+def test_streamed_text_is_emitted_once(swarm, run):
+    swarm([text("Hel", partial=True), text("lo", partial=True), text("Hello")])
+    events = collect(run, "say hello")
+    assert deltas(events) == ["Hel", "lo"]
+    assert events[-1]["type"] == "final" and events[-1]["text"] == "Hello"
+
+
+def test_an_unstreamed_answer_comes_from_the_aggregate_event(swarm, run):
+    swarm([text("Hello")])
+    events = collect(run, "say hello")
+    assert deltas(events) == ["Hello"]
+    assert events[-1]["text"] == "Hello"
+
+
+def test_each_model_turn_is_emitted_once_around_tool_calls(swarm, run):
+    swarm([
+        text("Let me check. ", partial=True), text("Let me check. "),
+        tool_call(partial=True), tool_call(),
+        event(Part(function_response=FunctionResponse(name="read_file", response={"ok": True}))),
+        text("Done", partial=True), text("Done"),
+    ])
+    events = collect(run, "check my notes")
+    assert [e["type"] for e in events] == ["text", "tool_call", "tool_result", "text", "final"]
+    assert deltas(events) == ["Let me check. ", "Done"]
+    assert events[-1]["text"] == "Let me check. Done"
+    assert events[-1]["tool_calls"] == 1
+
+
+def test_answers_with_tool_calls_are_not_cached(swarm, run):
+    runner = swarm([tool_call(), text("Done")])
+    collect(run, "check my notes")
+    second = collect(run, "check my notes")
+    assert runner.runs == 2
+    assert second[-1]["cached"] is False
+
+
+def test_a_session_never_reads_the_response_cache(swarm, run):
+    runner = swarm([text("All green.")])
+    collect(run, "status report")
+    cached = collect(run, "status report")
+    in_session = collect(run, "status report", session_id="chat-1")
+    assert cached[-1]["cached"] is True and deltas(cached) == ["All green."]
+    assert in_session[-1]["cached"] is False
+    assert runner.runs == 2
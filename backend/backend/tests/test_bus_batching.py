@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from backend.nexus_bus import BatchingPublisher, MemoryBus
+
+
+class RecordingBus(MemoryBus):
+    """MemoryBus that remembers the messages of every round trip."""
+    def __init__(self):
+        super().__init__()
+        self.batches: list[list[dict]] = []
+
+    async def _notify_many(self, frames):
+        self.batches.append([message for _, message, _ in frames])
+        await super()._notify_many(frames)
+
+
+class Numbered(BaseModel):
+    i: int
+
+
+async def _collect(bus, channel: str, count: int) -> asyncio.Task:
+    received = []
+
+    async def consume():
+        async for msg in bus.subscribe(channel):
+            received.append(msg["i"])
+            if len(received) == count:
+                return received
+
+    consumer = asyncio.create_task(consume())
+    while not bus._subscribers.get(channel):
+        await asyncio.sleep(0)
+    return consumer
+
+
+def test_publish_many_delivers_in_order_in_one_round_trip(run):
+    async def scenario():
+        bus = RecordingBus()
+        consumer = await _collect(bus, "ordered", 5)
+        await bus.publish_many("ordered", [{"i": i} for i in range(5)])
+        received = await consumer
+        await bus.close()
+        return received, bus.batches
+
+    received, batches = run(scenario())
+    assert received == [0, 1, 2, 3, 4]
+    assert len(batches) == 1
+
+
+def test_batcher_flushes_at_max_batch_without_waiting_for_the_window(run):
+    async def scenario():
+        bus = RecordingBus()
+        batcher = BatchingPublisher(bus, window=60, max_batch=3)
+        consumer = await _collect(bus, "full", 3)
+        await asyncio.gather(*(batcher.publish("full", {"i": i}) for i in range(3)))
+        received = await consumer
+        await bus.close()
+        return received, bus.batches
+
+    received, batches = run(scenario())
+    assert received == [0, 1, 2]
+    assert [[m["i"] for m in batch] for batch in batches] == [[0, 1, 2]]
+
+
+def test_batcher_coalesces_publishes_within_the_window(run):
+    async def scenario():
+        bus = RecordingBus()
+        batcher = BatchingPublisher(bus, window=0.05, max_batch=100)
+        consumer = await _collect(bus, "windowed", 4)
+        started = time.monotonic()
+        first = asyncio.gather(*(batcher.publish("windowed", {"i": i}) for i in range(2)))
+        await asyncio.sleep(0.01)
+        second = asyncio.gather(*(batcher.publish("windowed", {"i": i}) for i in range(2, 4)))
+        await asyncio.gather(first, second)
+        elapsed = time.monotonic() - started
+        received = await consumer
+        await bus.close()
+        return received, bus.batches, elapsed
+
+    received, batches, elapsed = run(scenario())
+    assert received == [0, 1, 2, 3]
+    assert len(batches) == 1
+    assert elapsed >= 0.05
+
+
+def test_an_invalid_message_fails_only_its_own_publish(run):
+    async def scenario():
+        bus = RecordingBus()
+        bus.register_schema("checked", Numbered)
+        batcher = BatchingPublisher(bus, window=0.01, max_batch=100)
+        consumer = await _collect(bus, "checked", 2)
+        results = await asyncio.gather(
+            batcher.publish("checked", {"i": 0}),
+            batcher.publish("checked", {"i": "not a number"}),
+            batcher.publish("checked", {"i": 2}),
+            return_exceptions=True,
+        )
+        received = await consumer
+        await bus.close()
+        return results, received
+
+    results, received = run(scenario())
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], ValidationError)
+    assert received == [0, 2]
+
+
+def test_publish_many_rejects_the_whole_call_before_sending_anything(run):
+    async def scenario():
+        bus = RecordingBus()
+        bus.register_schema("checked", Numbered)
+        with pytest.raises(ValidationError):
+            await bus.publish_many("checked", [{"i": 0}, {"i": "bad"}])
+        return bus.batches
+
+    assert run(scenario()) == []
@@ -0,0 +1,36 @@
+import pytest
+
+from backend.nexus_bus import Codec
+
+
+def test_codec_round_trips_json():
+    codec = Codec(binary="json", compress_threshold=0)
+    message = {"id": 1, "task": "hello", "nested": {"list": [1, 2.5, None, True]}}
+    frame = codec.encode(message)
+    assert frame.startswith("j")
+    assert codec.decode(frame) == message
+
+
+def test_codec_compresses_large_frames():
+    codec = Codec(binary="json", compress_threshold=64)
+    message = {"text": "swarm " * 500}
+    frame = codec.encode(message)
+    assert frame[0] in "zd" and frame[1] == "j"
+    assert len(frame) < len(Codec(compress_threshold=0).encode(message))
+    assert codec.decode(frame) == message
+
+
+def test_codec_round_trips_msgpack():
+    pytest.importorskip("msgpack")
+    codec = Codec(binary="msgpack", compress_threshold=0)
+    message = {"id": "a", "values": [1, 2, 3]}
+    frame = codec.encode(message)
+    assert frame.startswith("m")
+    assert codec.decode(frame) == message
+
+
+def test_codec_reads_legacy_json_and_rejects_unknown_tags():
+    codec = Codec()
+    assert codec.decode('{"id": 7}') == {"id": 7}
+    with pytest.raises(ValueError):
+        codec.decode("x???")
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from backend import nexus_bus
+from backend.nexus_bus import EXPIRED_MARKER, MemoryBus, is_expired, with_deadline
+
+
+def test_with_deadline_keeps_the_earliest():
+    now = time.time()
+    assert with_deadline({"id": 1}) == {"id": 1}
+    assert with_deadline({"id": 1}, deadline=now + 5)["deadline"] == now + 5
+    assert with_deadline({"deadline": now + 1}, ttl=60)["deadline"] == now + 1
+    assert with_deadline({"deadline": now + 60}, deadline=now + 2)["deadline"] == now + 2
+
+
+def test_is_expired():
+    now = time.time()
+    assert is_expired({"deadline": now - 1})
+    assert not is_expired({"deadline": now + 60})
+    assert not is_expired({"id": 1}) and not is_expired("not a dict")
+
+
+def test_subscribers_skip_expired_messages(run):
+    async def scenario():
+        bus = MemoryBus()
+        received = []
+
+        async def consume():
+            async for msg in bus.subscribe("tasks"):
+                received.append(msg)
+                if msg["i"] == 2:
+                    return
+
+        consumer = asyncio.create_task(consume())
+        while not bus._subscribers.get("tasks"):
+            await asyncio.sleep(0)
+        await bus.publish("tasks", {"i": 0}, ttl=60)
+        await bus.publish("tasks", {"i": 1}, deadline=time.time() - 1)
+        await bus.publish("tasks", {"i": 2})
+        await consumer
+        await bus.close()
+        return received, bus.metrics.channel("tasks").expired
+
+    received, expired = run(scenario())
+    assert [m["i"] for m in received] == [0, 2]
+    assert expired == 1
+
+
+def test_group_members_report_expired_messages_on_the_expiry_channel(monkeypatch, run):
+    monkeypatch.setattr(nexus_bus, "EXPIRY_CHANNEL", "expired_tasks")
+
+    async def scenario():
+        bus = MemoryBus()
+        received, reports = [], []
+
+        async def member():
+            async for msg in bus.subscribe("tasks", group="workers"):
+                received.append(msg)
+
+        async def watch_expiry():
+            async for msg in bus.subscribe("expired_tasks"):
+                reports.append(msg)
+                return
+
+        tasks = [asyncio.create_task(member()), asyncio.create_task(watch_expiry())]
+        while not (bus._subscribers.get("tasks") and bus._subscribers.get("expired_tasks")):
+            await asyncio.sleep(0)
+        await bus.publish("tasks", {"id": "late"}, deadline=time.time() - 1)
+        await bus.publish("tasks", {"id": "on-time"}, ttl=60)
+        await tasks[1]
+        while not received:
+            await asyncio.sleep(0)
+        tasks[0].cancel()
+        await bus.close()
+        return received, reports
+
+    received, reports = run(scenario())
+    assert [m["id"] for m in received] == ["on-time"]
+    assert len(reports) == 1
+    assert reports[0]["_bus"] == EXPIRED_MARKER and reports[0]["id"] == "late" and reports[0]["channel"] == "tasks"
+
+
+def test_requests_expire_when_the_caller_stops_waiting(run):
+    async def scenario():
+        bus = MemoryBus()
+        seen = []
+
+        async def responder():
+            async for msg in bus.subscribe("work"):
+                seen.append(msg)
+                return
+
+        task = asyncio.create_task(responder())
+        while not bus._subscribers.get("work"):
+            await asyncio.sleep(0)
+        try:
+            await bus.request("work", {"task": "slow"}, timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+        await task
+        await bus.close()
+        return seen[0]
+
+    request = run(scenario())
+    assert request["deadline"] - request["ts"] <= 0.06
@@ -0,0 +1,103 @@
+import asyncio
+import uuid
+
+import pytest
+
+from backend.nexus_bus import MemoryBus, PostgresBus
+
+
+async def consume_group(bus, channel: str, received: list, **kwargs):
+    async for msg in bus.subscribe(channel, group="workers", **kwargs):
+        received.append(msg)
+
+
+async def settle(received: list[list], expected: int, limit: float = 3):
+    """Waits until the members received `expected` messages between them, then a little longer."""
+    loop = asyncio.get_running_loop()
+    give_up_at = loop.time() + limit
+    while sum(map(len, received)) < expected and loop.time() < give_up_at:
+        await asyncio.sleep(0.02)
+    await asyncio.sleep(0.2)  # Room for any duplicate delivery to show up
+
+
+def test_each_message_reaches_one_local_member(run):
+    async def scenario():
+        bus = MemoryBus()
+        received = [[], []]
+        members = [asyncio.create_task(consume_group(bus, "tasks", r)) for r in received]
+        while not bus._subscribers.get("tasks"):
+            await asyncio.sleep(0)
+        for i in range(20):
+            await bus.publish("tasks", {"i": i})
+        # Identical messages are still separate messages
+        await bus.publish("tasks", {"dup": 1})
+        await bus.publish("tasks", {"dup": 1})
+        await settle(received, 22)
+        for member in members:
+            member.cancel()
+        await bus.close()
+        return received
+
+    received = run(scenario())
+    delivered = received[0] + received[1]
+    assert sorted(m["i"] for m in delivered if "i" in m) == list(range(20))
+    assert [m for m in delivered if "dup" in m] == [{"dup": 1}, {"dup": 1}]
+
+
+def test_group_members_do_not_see_broadcast_copies(run):
+    async def scenario():
+        bus = MemoryBus()
+        grouped, broadcast = [], []
+
+        async def listen():
+            async for msg in bus.subscribe("tasks"):
+                broadcast.append(msg)
+
+        tasks = [asyncio.create_task(consume_group(bus, "tasks", grouped)), asyncio.create_task(listen())]
+        while len(bus._subscribers.get("tasks", ())) < 2:
+            await asyncio.sleep(0)
+        for i in range(3):
+            await bus.publish("tasks", {"i": i})
+        await settle([grouped], 3)
+        for task in tasks:
+            task.cancel()
+        await bus.close()
+        return grouped, broadcast
+
+    grouped, broadcast = run(scenario())
+    assert [m["i"] for m in grouped] == [m["i"] for m in broadcast] == [0, 1, 2]
+
+
+def test_group_subscriptions_refuse_to_coalesce(run):
+    async def scenario():
+        async for _ in MemoryBus().subscribe("tasks", group="workers", overflow="coalesce"):
+            pass
+
+    with pytest.raises(ValueError):
+        run(scenario())
+
+
+def test_identical_messages_are_claimed_once_each_across_processes(run, dsn):
+    async def scenario():
+        # Two buses stand in for two worker processes
+        buses = [PostgresBus(dsn), PostgresBus(dsn)]
+        buses[1].member_id = f"{buses[0].member_id}-other"
+        channel = f"test_group_{uuid.uuid4().hex[:8]}"  # not retained, so frames carry message ids
+        received = [[], []]
+        members = [asyncio.create_task(consume_group(b, channel, r)) for b, r in zip(buses, received)]
+        while not all(b._subscribers.get(channel) for b in buses):
+            await asyncio.sleep(0.02)
+        await buses[0].publish_many(channel, [{"dup": 1}] * 3 + [{"i": i} for i in range(10)])
+        await buses[0].publish(channel, {"dup": 1})
+        await settle(received, 14, limit=10)
+        for member in members:
+            member.cancel()
+        await asyncio.gather(*members, return_exceptions=True)
+        for b in buses:
+            await b.close()
+        return received
+
+    received = run(scenario(), timeout=20)
+    delivered = received[0] + received[1]
+    assert len([m for m in delivered if "dup" in m]) == 4
+    assert sorted(m["i"] for m in delivered if "i" in m) == list(range(10))
@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+from backend.nexus_bus import MemoryBus
+
+
+def test_memory_bus_gives_each_subscriber_its_own_copy(run):
+    async def scenario():
+        bus = MemoryBus()
+        received = [[], []]
+
+        async def consume(index: int):
+            async for msg in bus.subscribe("fanout"):
+                msg["seen_by"] = index
+                received[index].append(msg)
+                if len(received[index]) == 3:
+                    return
+
+        consumers = [asyncio.create_task(consume(i)) for i in range(2)]
+        while len(bus._subscribers.get("fanout", ())) < 2:
+            await asyncio.sleep(0)
+        for i in range(3):
+            await bus.publish("fanout", {"i": i})
+        await asyncio.gather(*consumers)
+        await bus.close()
+        return received
+
+    first, second = run(scenario())
+    assert [m["i"] for m in first] == [m["i"] for m in second] == [0, 1, 2]
+    assert all(m["seen_by"] == 0 for m in first)
+    assert all(m["seen_by"] == 1 for m in second)
+
+
+def test_memory_bus_drops_messages_nobody_listens_for(run):
+    async def scenario():
+        bus = MemoryBus()
+        await bus.publish("lonely", {"i": 0})
+        received = []
+
+        async def consume():
+            async for msg in bus.subscribe("lonely"):
+                received.append(msg)
+                return
+
+        consumer = asyncio.create_task(consume())
+        while not bus._subscribers.get("lonely"):
+            await asyncio.sleep(0)
+        await bus.publish("lonely", {"i": 1})
+        await consumer
+        await bus.close()
+        return received
+
+    assert run(scenario()) == [{"i": 1}]
+
+
+def test_metrics_snapshot_counts_traffic_drops_and_lag(run):
+    async def scenario():
+        bus = MemoryBus()
+        messages = bus.subscribe("metered", maxsize=2, overflow="drop_newest")
+        first = asyncio.create_task(messages.__anext__())
+        while not bus._subscribers.get("metered"):
+            await asyncio.sleep(0)
+        sent_at = time.time() - 0.5
+        await bus.publish("metered", {"i": 0, "ts": sent_at})
+        await first
+        # The subscriber is now busy with its first message, so its buffer fills up
+        await bus.publish_many("metered", [{"i": i, "ts": sent_at} for i in range(1, 6)])
+        while bus.metrics.channel("metered").received < 6:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        snapshot = bus.metrics_snapshot()
+        await messages.aclose()
+        await bus.close()
+        return snapshot
+
+    snapshot = run(scenario())
+    assert snapshot["backend"] == "MemoryBus"
+    channel = snapshot["channels"]["metered"]
+    assert (channel["published"], channel["received"]) == (6, 6)
+    assert channel["bytes_out"] == channel["bytes_in"] > 0
+    assert channel["encode"]["count"] == channel["decode"]["count"] == 6
+    assert channel["subscribers"] == {"count": 1, "depth": 2, "dropped": 3, "coalesced": 0}
+    assert channel["inbox"] == {"depth": 0, "dropped": 0}
+    assert channel["lag"]["count"] == 6
+    assert channel["lag"]["p50_ms"] >= 500
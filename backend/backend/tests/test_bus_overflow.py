@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from backend.nexus_bus import Subscription
+
+
+async def drain(subscription: Subscription) -> list:
+    items = []
+    while subscription.stats()["depth"]:
+        items.append(await subscription.get())
+    return items
+
+
+def test_subscription_rejects_bad_policies():
+    with pytest.raises(ValueError):
+        Subscription("c", overflow="explode")
+    with pytest.raises(ValueError):
+        Subscription("c", overflow="coalesce")
+
+
+def test_drop_oldest_keeps_newest(run):
+    async def scenario():
+        sub = Subscription("c", maxsize=2, overflow="drop_oldest")
+        for i in range(4):
+            await sub.put({"i": i})
+        return sub, await drain(sub)
+
+    sub, items = run(scenario())
+    assert items == [{"i": 2}, {"i": 3}]
+    assert sub.dropped == 2
+
+
+def test_drop_newest_keeps_oldest(run):
+    async def scenario():
+        sub = Subscription("c", maxsize=2, overflow="drop_newest")
+        for i in range(4):
+            await sub.put({"i": i})
+        return sub, await drain(sub)
+
+    sub, items = run(scenario())
+    assert items == [{"i": 0}, {"i": 1}]
+    assert sub.dropped == 2
+
+
+def test_coalesce_replaces_in_place(run):
+    async def scenario():
+        sub = Subscription("c", maxsize=10, overflow="coalesce", key="worker")
+        await sub.put({"worker": "a", "v": 1})
+        await sub.put({"worker": "b", "v": 1})
+        await sub.put({"worker": "a", "v": 2})
+        return sub, await drain(sub)
+
+    sub, items = run(scenario())
+    assert items == [{"worker": "a", "v": 2}, {"worker": "b", "v": 1}]
+    assert sub.coalesced == 1
+
+
+def test_block_waits_for_room(run):
+    async def scenario():
+        sub = Subscription("c", maxsize=1, overflow="block")
+        await sub.put({"i": 0})
+        pending = asyncio.create_task(sub.put({"i": 1}))
+        await asyncio.sleep(0.01)
+        assert not pending.done()
+        first = await sub.get()
+        await pending
+        return first, await sub.get(), sub.dropped
+
+    assert run(scenario()) == ({"i": 0}, {"i": 1}, 0)
@@ -0,0 +1,146 @@
+import asyncio
+import base64
+import os
+import uuid
+
+from backend.nexus_bus import PostgresBus
+
+
+def fresh_channel(prefix: str) -> str:
+    # NOTIFY channels span the whole database, whatever the test schema
+    return f"{prefix}_{uuid.uuid4().hex[:8]}"
+
+
+async def collect(bus, channel: str, received: list, **kwargs) -> asyncio.Task:
+    async def consume():
+        async for msg in bus.subscribe(channel, **kwargs):
+            received.append(msg)
+
+    consumer = asyncio.create_task(consume())
+    while not bus._subscribers.get(channel):
+        await asyncio.sleep(0.02)
+    return consumer
+
+
+async def wait_for(predicate, limit: float = 5):
+    deadline = asyncio.get_running_loop().time() + limit
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached in time")
+        await asyncio.sleep(0.02)
+
+
+def test_oversized_payloads_travel_by_claim_check(run, dsn):
+    async def scenario():
+        bus = PostgresBus(dsn, spill_retention=1)
+        channel = fresh_channel("test_spill")
+        received = []
+        consumer = await collect(bus, channel, received)
+        # Random text barely compresses, so the frame stays over the 8000-byte NOTIFY limit
+        blob = base64.b64encode(os.urandom(16000)).decode("ascii")
+        await bus.publish(channel, {"blob": blob})
+        await wait_for(lambda: received)
+        async with bus.pool.acquire() as conn:
+            stored = await conn.fetchval("SELECT count(*) FROM nexus_bus_payloads WHERE channel = $1", channel)
+        await asyncio.sleep(1.1)
+        bus._last_purge = 0.0  # purges otherwise run at most once a minute
+        await bus.publish(channel, {"small": True})
+        await wait_for(lambda: len(received) == 2)
+        async with bus.pool.acquire() as conn:
+            left = await conn.fetchval("SELECT count(*) FROM nexus_bus_payloads WHERE channel = $1", channel)
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        await bus.close()
+        return blob, received, stored, left
+
+    blob, received, stored, left = run(scenario(), timeout=20)
+    assert received[0] == {"blob": blob}
+    assert stored == 1
+    assert left == 0
+
+
+async def drop_listen_connection(bus: PostgresBus):
+    """Kills the LISTEN backend from another session and waits until the bus notices."""
+    pid = bus._listen_conn.get_server_pid()
+    async with bus.pool.acquire() as conn:
+        await conn.execute("SELECT pg_terminate_backend($1)", pid)
+    await wait_for(bus._listen_conn.is_closed)
+
+
+def test_messages_missed_while_disconnected_are_replayed_in_order(run, dsn):
+    async def scenario():
+        bus = PostgresBus(dsn)
+        channel = fresh_channel("test_replay")
+        bus.retain_channels = {channel}
+        received = []
+        consumer = await collect(bus, channel, received)
+        await bus.publish(channel, {"i": 0})
+        await wait_for(lambda: received)
+        # Holding the listen lock keeps the reconnect from re-LISTENing until we are done
+        async with bus._listen_lock:
+            await drop_listen_connection(bus)
+            await bus.publish_many(channel, [{"i": i} for i in range(1, 4)])
+        await wait_for(lambda: len(received) == 4)
+        await asyncio.sleep(0.1)
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        await bus.close()
+        return received
+
+    received = run(scenario(), timeout=20)
+    assert [m["i"] for m in received] == [0, 1, 2, 3]
+
+
+def test_a_gap_marker_reports_messages_pruned_during_the_outage(run, dsn):
+    async def scenario():
+        bus = PostgresBus(dsn)
+        channel = fresh_channel("test_gap")
+        bus.retain_channels = {channel}
+        received = []
+        consumer = await collect(bus, channel, received)
+        await bus.publish(channel, {"i": 0})
+        await wait_for(lambda: received)
+        async with bus._listen_lock:
+            await drop_listen_connection(bus)
+            # With no retention window, the purge after this publish empties the log
+            bus.retention = 0
+            bus._last_purge = 0.0
+            await bus.publish_many(channel, [{"i": i} for i in range(1, 4)])
+        await wait_for(lambda: len(received) == 2)
+        bus.retention = 600
+        await bus.publish(channel, {"i": 4})
+        await wait_for(lambda: len(received) == 3)
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        await bus.close()
+        return channel, received
+
+    channel, (first, gap, after) = run(scenario(), timeout=20)
+    assert first == {"i": 0}
+    assert gap == {"_bus": "gap", "channel": channel, "from_seq": 2, "to_seq": 4}
+    assert after == {"i": 4}
+
+
+def test_subscribers_share_one_listen_connection(run, dsn):
+    async def scenario():
+        bus = PostgresBus(dsn)
+        first, second = fresh_channel("test_shared"), fresh_channel("test_shared")
+
+        async def listening() -> set:
+            rows = await bus._listen_conn.fetch("SELECT pg_listening_channels() AS channel")
+            return {row["channel"] for row in rows}
+
+        consumers = [await collect(bus, channel, []) for channel in (first, first, second)]
+        conn = bus._listen_conn
+        states = [(bus.connection_stats()["listen_connections"], await listening())]
+        for consumer in consumers:
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+            states.append((bus._listen_conn is conn, await listening()))
+        await bus.close()
+        return first, second, states
+
+    first, second, states = run(scenario(), timeout=20)
+    assert states[0] == (1, {first, second})
+    # The channel stays LISTENed until its last subscriber leaves
+    assert states[1:] == [(True, {first, second}), (True, {second}), (True, set())]
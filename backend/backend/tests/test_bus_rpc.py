@@ -0,0 +1,111 @@
+import asyncio
+
+from backend.nexus_bus import CHUNK, FINAL, MemoryBus, ReplyRouter
+
+
+class FlakyListenBus(MemoryBus):
+    """Memory bus whose first LISTEN fails after a short delay."""
+    def __init__(self):
+        super().__init__()
+        self.listen_calls = 0
+
+    async def _listen(self, channel: str):
+        self.listen_calls += 1
+        await asyncio.sleep(0.01)
+        if self.listen_calls == 1:
+            raise ConnectionError("listen failed")
+
+
+def test_request_gets_the_matching_reply(run):
+    async def scenario():
+        bus = MemoryBus()
+
+        async def responder():
+            async for msg in bus.subscribe("work"):
+                await bus.publish(msg["reply_to"], {"id": "someone-else", "status": "SUCCESS"})
+                await bus.publish(msg["reply_to"], {"id": msg["id"], "status": "SUCCESS", "echo": msg["task"]})
+                return
+
+        task = asyncio.create_task(responder())
+        while not bus._subscribers.get("work"):
+            await asyncio.sleep(0)
+        reply = await bus.request("work", {"task": "ping"}, timeout=2)
+        await task
+        await bus.close()
+        return reply
+
+    reply = run(scenario())
+    assert reply["status"] == "SUCCESS" and reply["echo"] == "ping"
+
+
+def test_reply_router_routes_by_id_and_skips_chunks(run):
+    async def scenario():
+        router = ReplyRouter("replies")
+        future = router.expect("r1")
+        await router.put({"id": "r1", "type": CHUNK, "seq": 0, "delta": "par"})
+        assert not future.done()
+        await router.put({"id": "other", "status": "SUCCESS"})
+        await router.put({"id": "r1", "type": FINAL, "status": "SUCCESS"})
+        return router, await future
+
+    router, reply = run(scenario())
+    assert reply["status"] == "SUCCESS"
+    assert router.delivered == 1 and router.unmatched == 1
+    assert router.stats()["pending"] == 0
+
+
+def test_reply_router_streams_every_message_for_an_open_stream(run):
+    async def scenario():
+        router = ReplyRouter("replies")
+        queue = router.open_stream("r1")
+        await router.put({"id": "r1", "type": CHUNK, "seq": 0, "delta": "a"})
+        await router.put({"id": "r1", "type": FINAL, "status": "SUCCESS"})
+        router.close_stream("r1")
+        return [queue.get_nowait(), queue.get_nowait()], router.stats()["streams"]
+
+    messages, streams = run(scenario())
+    assert [m["type"] for m in messages] == [CHUNK, FINAL]
+    assert streams == 0
+
+
+def test_callers_waiting_on_a_failed_reply_listener_fail_too(run):
+    async def scenario():
+        bus = FlakyListenBus()
+        first = asyncio.create_task(bus.request("work", {"task": "a"}, timeout=2))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(bus.request("work", {"task": "b"}, timeout=2))
+        results = await asyncio.gather(first, second, return_exceptions=True)
+        # The next caller starts a fresh listener
+        router = await bus._reply_router("swarm_results")
+        await bus.close()
+        return results, router, bus.listen_calls
+
+    results, router, listen_calls = run(scenario())
+    assert all(isinstance(r, ConnectionError) for r in results)
+    assert router.error is None and listen_calls == 2
+
+
+def test_waiters_outlive_a_cancelled_first_caller(run):
+    async def scenario():
+        bus = MemoryBus()
+        gate = asyncio.Event()
+        listen = bus._listen
+
+        async def slow_listen(channel):
+            await gate.wait()
+            await listen(channel)
+
+        bus._listen = slow_listen
+        first = asyncio.create_task(bus._reply_router("replies"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(bus._reply_router("replies"))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        router = await second
+        await bus.close()
+        return first.cancelled(), router
+
+    cancelled, router = run(scenario())
+    assert cancelled and router.error is None
@@ -0,0 +1,54 @@
+import asyncio
+
+from backend.nexus_bus import CHUNK, FINAL, STREAMING_STATUS, MemoryBus, StreamAssembler
+
+
+def chunk(seq: int, delta: str) -> dict:
+    return {"id": "r1", "type": CHUNK, "status": STREAMING_STATUS, "seq": seq, "delta": delta}
+
+
+def test_stream_assembler_orders_and_deduplicates():
+    assembler = StreamAssembler()
+    assert assembler.push(chunk(1, "lo ")) == []
+    assert [c["seq"] for c in assembler.push(chunk(0, "hel"))] == [0, 1]
+    assert assembler.push(chunk(1, "lo ")) == []
+    assert [c["seq"] for c in assembler.push(chunk(2, "world"))] == [2]
+    final = {"id": "r1", "type": FINAL, "seq": 3, "status": "SUCCESS"}
+    assert assembler.push(final) == [final]
+    assert assembler.done and assembler.text == "hello world"
+
+
+def test_stream_assembler_final_releases_held_chunks():
+    assembler = StreamAssembler()
+    assembler.push(chunk(0, "a"))
+    assert assembler.push(chunk(2, "c")) == []
+    final = {"id": "r1", "type": FINAL, "seq": 3, "status": "SUCCESS"}
+    ready = assembler.push(final)
+    assert [m.get("seq") for m in ready] == [2, 3]
+    assert assembler.text == "ac"
+
+
+def test_bus_stream_yields_chunks_then_final(run):
+    async def scenario():
+        bus = MemoryBus()
+
+        async def worker():
+            async for msg in bus.subscribe("work"):
+                assert msg["stream"] is True
+                for seq, delta in enumerate(["to", "ken"]):
+                    await bus.publish(msg["reply_to"], dict(chunk(seq, delta), id=msg["id"]))
+                await bus.publish(msg["reply_to"], {"id": msg["id"], "type": FINAL, "seq": 2,
+                                                    "status": "SUCCESS", "result": "token"})
+                return
+
+        task = asyncio.create_task(worker())
+        while not bus._subscribers.get("work"):
+            await asyncio.sleep(0)
+        events = [event async for event in bus.stream("work", {"task": "t"}, timeout=2)]
+        await task
+        await bus.close()
+        return events
+
+    events = run(scenario())
+    assert [e.get("delta") for e in events[:-1]] == ["to", "ken"]
+    assert events[-1]["result"] == "token"
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from backend.response_cache import ResponseCache, cosine, normalize
+
+
+def make_cache(**kwargs) -> ResponseCache:
+    options = dict(ttl=60, max_entries=8, embed_model="", enabled=True)
+    options.update(kwargs)
+    return ResponseCache(**options)
+
+
+def test_normalize_ignores_case_spacing_and_trailing_punctuation():
+    assert normalize("  Status   Report?! ") == normalize("status report") == "status report"
+
+
+def test_cosine():
+    assert cosine([1.0, 0.0], [1.0, 0.0]) == pytest.approx(1.0)
+    assert cosine([1.0, 0.0], [0.0, 1.0]) == pytest.approx(0.0)
+    assert cosine([0.0, 0.0], [1.0, 1.0]) == 0.0
+
+
+def test_hit_after_put_and_miss_in_another_scope(run):
+    async def scenario():
+        cache = make_cache()
+        await cache.put("swarm/m/abc/alice", "What's the status?", "All green.")
+        hit = await cache.get("swarm/m/abc/alice", "what's the status")
+        other_user = await cache.get("swarm/m/abc/bob", "what's the status")
+        return hit, other_user, cache.stats()
+
+    hit, other_user, stats = run(scenario())
+    assert hit == "All green." and other_user is None
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_entries_expire_after_the_ttl(run):
+    async def scenario():
+        cache = make_cache(ttl=0.01)
+        await cache.put("s", "ping", "pong")
+        await asyncio.sleep(0.02)
+        return await cache.get("s", "ping"), len(cache)
+
+    assert run(scenario()) == (None, 0)
+
+
+def test_least_recently_used_entries_are_evicted(run):
+    async def scenario():
+        cache = make_cache(max_entries=2)
+        await cache.put("s", "a", "A")
+        await cache.put("s", "b", "B")
+        await cache.get("s", "a")  # b is now the least recently used
+        await cache.put("s", "c", "C")
+        return [await cache.get("s", task) for task in ("a", "b", "c")], cache.evictions
+
+    answers, evictions = run(scenario())
+    assert answers == ["A", None, "C"] and evictions == 1
+
+
+def test_a_disabled_cache_stores_nothing(run):
+    async def scenario():
+        cache = make_cache(enabled=False)
+        await cache.put("s", "ping", "pong")
+        return await cache.get("s", "ping"), len(cache)
+
+    assert run(scenario()) == (None, 0)
+
+
+def test_near_duplicates_match_on_embeddings(run):
+    vectors = {"status report": [1.0, 0.0], "status report please": [0.99, 0.05], "weather": [0.0, 1.0]}
+
+    async def embed(text):
+        return vectors[text]
+
+    async def scenario():
+        cache = make_cache(embed_model="test-embed", similarity=0.95)
+        cache._embed = embed
+        await cache.put("s", "Status report", "All green.")
+        near = await cache.get("s", "status report please")
+        far = await cache.get("s", "weather")
+        return near, far, cache.stats()
+
+    near, far, stats = run(scenario())
+    assert near == "All green." and far is None
+    assert stats["semantic_hits"] == 1 and stats["misses"] == 1
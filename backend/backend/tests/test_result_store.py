@@ -0,0 +1,64 @@
+import time
+
+from backend.nexus_bus import MemoryBus
+from backend.result_store import ATTACHED, DONE, RUN, ResultStore, idempotency_key, waiter_of
+
+
+def test_idempotency_key_prefers_the_client_key():
+    assert idempotency_key({"id": 7, "idempotency_key": "mission-1"}) == "mission-1"
+    assert idempotency_key({"id": 7}) == "7"
+    assert idempotency_key({"task": "no id"}) is None
+
+
+def test_waiter_defaults_to_swarm_results():
+    assert waiter_of({"id": "a"}) == {"reply_to": "swarm_results", "id": "a"}
+    assert waiter_of({"id": "a", "reply_to": "mine"}) == {"reply_to": "mine", "id": "a"}
+
+
+def test_duplicates_attach_to_the_running_task_and_get_its_result(run):
+    async def scenario():
+        store = ResultStore(MemoryBus())
+        first = await store.begin("k", "worker-a", waiter_of({"id": "r1"}))
+        retry = await store.begin("k", "worker-b", waiter_of({"id": "r2", "reply_to": "elsewhere"}))
+        waiters = await store.complete("k", {"status": "SUCCESS", "result": "done"})
+        late = await store.begin("k", "worker-b", waiter_of({"id": "r3"}))
+        return first, retry, waiters, late
+
+    first, retry, waiters, late = run(scenario())
+    assert first == (RUN, None)
+    assert retry == (ATTACHED, None)
+    assert waiters == [{"reply_to": "elsewhere", "id": "r2"}]
+    assert late == (DONE, {"status": "SUCCESS", "result": "done"})
+
+
+def test_a_duplicate_without_a_waiter_is_not_attached(run):
+    async def scenario():
+        store = ResultStore(MemoryBus())
+        await store.begin("k", "worker-a", None)
+        outcome = await store.begin("k", "worker-b", None)
+        return outcome, await store.release("k")
+
+    assert run(scenario()) == ((ATTACHED, None), [])
+
+
+def test_released_keys_run_again_and_hand_back_their_waiters(run):
+    async def scenario():
+        store = ResultStore(MemoryBus())
+        await store.begin("k", "worker-a", None)
+        await store.begin("k", "worker-b", {"reply_to": "swarm_results", "id": "r2"})
+        waiters = await store.release("k")
+        return waiters, await store.begin("k", "worker-b", None)
+
+    waiters, again = run(scenario())
+    assert waiters == [{"reply_to": "swarm_results", "id": "r2"}]
+    assert again == (RUN, None)
+
+
+def test_a_running_key_past_its_lease_runs_again(run):
+    async def scenario():
+        store = ResultStore(MemoryBus())
+        await store.begin("k", "worker-a", None)
+        store._local["k"]["expires_at"] = time.time() - 1  # worker-a vanished
+        return await store.begin("k", "worker-b", None)
+
+    assert run(scenario()) == (RUN, None)
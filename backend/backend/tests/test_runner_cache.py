@@ -0,0 +1,78 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+import google.adk.runners
+import yaml
+
+from backend import agents, pg_session_service
+from backend.vram_manager import VRAM_MANAGER_SENTINEL
+
+MODELS = {"manager": {"model": "qwen3:8b"}, "coder": {"model": "qwen3:8b"},
+          "browser": {"model": "qwen3-vl:8b"}, "auditor": {"model": "qwen3:8b"}}
+
+
+class StubRunner:
+    def __init__(self, agent, app_name, session_service):
+        self.agent = agent
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """A RunnerCache on a temp config file, building stub agents and runners."""
+    path = tmp_path / "agent_models.yaml"
+    path.write_text(yaml.safe_dump({"models": MODELS}))
+    built = []
+
+    def build_swarm(models):
+        built.append(models)
+        return SimpleNamespace(name="Nexus", models=models)
+
+    monkeypatch.setattr(agents, "CONFIG_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(agents, "build_swarm", build_swarm)
+    monkeypatch.setattr(agents, "build_sentinel", lambda: SimpleNamespace(name="Sentinel"))
+    monkeypatch.setattr(google.adk.runners, "Runner", StubRunner)
+    monkeypatch.setattr(pg_session_service, "get_session_service", lambda: None)
+    return agents.RunnerCache(config_path=str(path)), path, built
+
+
+def touch(path, content: dict = None):
+    """Rewrites the config (or leaves its text alone) and moves its mtime forward."""
+    if content is not None:
+        path.write_text(yaml.safe_dump(content))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_runners_are_reused_while_the_config_is_unchanged(cache):
+    runners, _, built = cache
+    swarm = runners.runner("qwen3:8b")
+    assert runners.runner("deepseek-r1:14b") is swarm
+    sentinel = runners.runner(VRAM_MANAGER_SENTINEL)
+    assert sentinel is not swarm and sentinel.agent.name == "Sentinel"
+    assert runners.runner(VRAM_MANAGER_SENTINEL) is sentinel
+    assert len(built) == runners.builds == 1
+
+
+def test_a_touched_config_with_the_same_content_is_not_rebuilt(cache):
+    runners, path, built = cache
+    swarm = runners.runner("qwen3:8b")
+    touch(path)
+    assert runners.runner("qwen3:8b") is swarm
+    assert len(built) == 1
+
+
+def test_an_edited_config_rebuilds_agents_and_runners(cache):
+    runners, path, built = cache
+    swarm = runners.runner("qwen3:8b")
+    scope = runners.scope("qwen3:8b")
+    touch(path, {"models": dict(MODELS, manager={"model": "qwen3:14b"})})
+    rebuilt = runners.runner("qwen3:8b")
+    assert rebuilt is not swarm
+    assert rebuilt.agent.models["manager"] == {"model": "qwen3:14b"}
+    assert runners.builds == 2
+    # Cached answers from the old agents no longer match
+    assert runners.scope("qwen3:8b") != scope
@@ -0,0 +1,68 @@
+import pytest
+
+pytest.importorskip("google.adk")
+pytest.importorskip("aiosqlite")
+
+from google.adk.events import Event, EventActions
+from google.genai.types import Content, FunctionCall, FunctionResponse, Part
+
+from backend.pg_session_service import WindowedSessionService
+
+APP, USER, SESSION = "nexus_prime", "nexus-user", "chat-1"
+
+
+def said(author: str, text: str, **actions) -> Event:
+    role = "user" if author == "user" else "model"
+    return Event(author=author, content=Content(role=role, parts=[Part(text=text)]),
+                 actions=EventActions(**actions))
+
+
+def history(run, db_path, events: list[Event], window: int):
+    async def scenario():
+        service = WindowedSessionService(f"sqlite+aiosqlite:///{db_path}", history_window=window)
+        session = await service.create_session(app_name=APP, user_id=USER, session_id=SESSION)
+        for event in events:
+            await service.append_event(session, event)
+        loaded = await service.get_session(app_name=APP, user_id=USER, session_id=SESSION)
+        await service.close()
+        return loaded
+
+    return run(scenario())
+
+
+def texts(session) -> list:
+    return [e.content.parts[0].text if e.content else None for e in session.events]
+
+
+def test_only_the_last_events_are_loaded(run, tmp_path):
+    events = [said(author, f"{author} {i}") for i in range(5) for author in ("user", "Nexus")]
+    session = history(run, tmp_path / "sessions.db", events, window=4)
+    assert texts(session) == ["user 3", "Nexus 3", "user 4", "Nexus 4"]
+
+
+def test_the_window_starts_on_a_user_turn(run, tmp_path):
+    events = [said(author, f"{author} {i}") for i in range(5) for author in ("user", "Nexus")]
+    session = history(run, tmp_path / "sessions.db", events, window=5)
+    assert texts(session) == ["user 3", "Nexus 3", "user 4", "Nexus 4"]
+
+
+def test_state_survives_the_window(run, tmp_path):
+    # Events are ordered by their creation timestamp, so they are built in order
+    events = [
+        said("user", "user 0", state_delta={"project": "nexus"}),
+        said("Nexus", "Nexus 0"),
+        said("user", "user 1"),
+        Event(author="Nexus", content=Content(role="model", parts=[
+            Part(function_call=FunctionCall(name="read_file", args={}))])),
+        Event(author="Nexus", content=Content(role="user", parts=[
+            Part(function_response=FunctionResponse(name="read_file", response={"ok": True}))])),
+        Event(author="Nexus", actions=EventActions(state_delta={"mood": "calm"})),
+        said("user", "user 2"),
+        said("Nexus", "Nexus 2"),
+    ]
+    session = history(run, tmp_path / "sessions.db", events, window=4)
+    # The orphaned tool response is trimmed; the state-only event before the user turn is not
+    assert texts(session) == [None, "user 2", "Nexus 2"]
+    assert session.events[0].actions.state_delta == {"mood": "calm"}
+    # State set by events outside the window is still loaded
+    assert session.state == {"project": "nexus", "mood": "calm"}
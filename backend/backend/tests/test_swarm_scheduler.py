@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+from backend.swarm_scheduler import PriorityScheduler, lane_of
+
+
+async def take(scheduler: PriorityScheduler, n: int) -> list[str]:
+    return [(await scheduler.get()).message["id"] for _ in range(n)]
+
+
+def test_lane_of_reads_names_and_indexes():
+    assert lane_of({"priority": "interactive"}) == "interactive"
+    assert lane_of({"priority": 2}) == "batch"
+    assert lane_of({"priority": "urgent"}) == "normal"
+    assert lane_of({}) == "normal"
+
+
+def test_higher_lanes_run_first_and_fifo_within_a_lane(run):
+    async def scenario():
+        scheduler = PriorityScheduler(aging_interval=3600)
+        await scheduler.put({"id": "b1", "priority": "batch"})
+        await scheduler.put({"id": "n1"})
+        await scheduler.put({"id": "i1", "priority": "interactive"})
+        await scheduler.put({"id": "n2"})
+        return await take(scheduler, 4), scheduler
+
+    order, scheduler = run(scenario())
+    assert order == ["i1", "n1", "n2", "b1"]
+    assert scheduler.promoted == 0 and len(scheduler) == 0
+
+
+def test_aging_promotes_a_long_waiting_task(run):
+    async def scenario():
+        scheduler = PriorityScheduler(aging_interval=10)
+        await scheduler.put({"id": "old-batch", "priority": "batch"})
+        await scheduler.put({"id": "new-interactive", "priority": "interactive"})
+        # Waited for three aging intervals: now ahead of a fresh interactive task
+        scheduler.pending()[-1].enqueued_at -= 30
+        return await take(scheduler, 2), scheduler
+
+    order, scheduler = run(scenario())
+    assert order == ["old-batch", "new-interactive"]
+    assert scheduler.promoted == 1
+
+
+def test_wait_for_room_blocks_at_the_prefetch_limit(run):
+    async def scenario():
+        scheduler = PriorityScheduler()
+        await scheduler.put({"id": "a"})
+        await scheduler.put({"id": "b"})
+        waiter = asyncio.create_task(scheduler.wait_for_room(limit=2))
+        await asyncio.sleep(0.01)
+        blocked = not waiter.done()
+        await scheduler.get()
+        await waiter
+        return blocked, [t.message["id"] for t in scheduler.pending()]
+
+    blocked, pending = run(scenario())
+    assert blocked and pending == ["b"]
+
+
+def test_a_busy_session_keeps_its_tasks_queued(run):
+    async def scenario():
+        scheduler = PriorityScheduler(aging_interval=3600, session_of=lambda msg: msg.get("session"))
+        await scheduler.put({"id": "a1", "session": "a"})
+        first = await scheduler.get()
+        await scheduler.put({"id": "a2", "session": "a", "priority": "interactive"})
+        await scheduler.put({"id": "b1", "session": "b", "priority": "batch"})
+        # a2 is more urgent, but its session is busy
+        second = await scheduler.get()
+        blocked = asyncio.create_task(scheduler.get())
+        await asyncio.sleep(0.01)
+        waited, pending = not blocked.done(), len(scheduler)
+        await scheduler.done(first)
+        third = await blocked
+        return [first.message["id"], second.message["id"], third.message["id"]], waited, pending
+
+    order, waited, pending = run(scenario())
+    assert order == ["a1", "b1", "a2"]
+    assert waited and pending == 1
+
+
+def test_the_next_turn_of_a_session_keeps_its_lane(run):
+    async def scenario():
+        scheduler = PriorityScheduler(aging_interval=3600, session_of=lambda msg: "default")
+        for i in range(6):
+            await scheduler.put({"id": f"batch{i}", "priority": "batch"})
+        first = await scheduler.get()
+        await scheduler.put({"id": "interactive", "priority": "interactive"})
+        pending = len(scheduler)
+        await scheduler.done(first)
+        return (await scheduler.get()).message["id"], pending
+
+    assert run(scenario()) == ("interactive", 6)
+
+
+def test_affinity_prefers_tasks_on_warm_models(run):
+    async def scenario():
+        scheduler = PriorityScheduler(aging_interval=3600, affinity_max_delay=60,
+                                      predict_models=lambda msg: frozenset([msg["model"]]))
+        await scheduler.put({"id": "warm-up", "model": "llama"})
+        await take(scheduler, 1)
+        await scheduler.put({"id": "cold", "model": "qwen"})
+        await scheduler.put({"id": "warm", "model": "llama"})
+        return await take(scheduler, 2), scheduler
+
+    order, scheduler = run(scenario())
+    assert order == ["warm", "cold"]
+    assert scheduler.swaps_avoided == 1
+
+
+def test_affinity_gives_up_after_the_max_delay(run):
+    async def scenario():
+        scheduler = PriorityScheduler(aging_interval=3600, affinity_max_delay=5,
+                                      predict_models=lambda msg: frozenset([msg["model"]]))
+        await scheduler.put({"id": "warm-up", "model": "llama"})
+        await take(scheduler, 1)
+        await scheduler.put({"id": "cold", "model": "qwen"})
+        await scheduler.put({"id": "warm", "model": "llama"})
+        next(t for t in scheduler.pending() if t.message["id"] == "cold").enqueued_at = time.monotonic() - 10
+        return await take(scheduler, 2), scheduler
+
+    order, scheduler = run(scenario())
+    assert order == ["cold", "warm"]
+    assert scheduler.swaps_avoided == 0
+
+
+def test_warm_set_is_bounded_by_vram_capacity(run):
+    async def scenario():
+        scheduler = PriorityScheduler(predict_models=lambda msg: frozenset([msg["model"]]),
+                                      model_size=lambda model: 6.0, vram_capacity_gb=12.0)
+        for model in ("a", "b", "c"):
+            await scheduler.put({"id": model, "model": model})
+            await take(scheduler, 1)
+        return scheduler.stats()
+
+    stats = run(scenario())
+    assert stats["warm_models"] == ["b", "c"]
+    assert stats["model_loads"] == 3
@@ -0,0 +1,35 @@
+from backend import worker_registry
+from backend.swarm_supervisor import SwarmSupervisor, WorkerProcess
+
+
+class FailingReclaimRegistry:
+    def __init__(self):
+        self.deregistered = []
+
+    async def reclaim_stuck(self, worker_id=None):
+        raise RuntimeError("relation \"nexus_bus_tasks\" does not exist")
+
+    async def deregister(self, worker_id):
+        self.deregistered.append(worker_id)
+
+
+def test_children_inherit_the_worker_budget(monkeypatch):
+    monkeypatch.setenv("SWARM_VRAM_BUDGET_GB", "16")
+    monkeypatch.delenv("SWARM_CHILD_VRAM_BUDGET_GB", raising=False)
+    supervisor = SwarmSupervisor(workers=4)
+    env = supervisor._child_env(WorkerProcess(0, "host"))
+    assert env["SWARM_VRAM_BUDGET_GB"] == "16" and env["SWARM_WORKER_ID"] == "host-w0"
+
+
+def test_an_explicit_child_budget_wins(monkeypatch):
+    monkeypatch.setenv("SWARM_VRAM_BUDGET_GB", "16")
+    monkeypatch.setenv("SWARM_CHILD_VRAM_BUDGET_GB", "6")
+    env = SwarmSupervisor(workers=2)._child_env(WorkerProcess(1, "host"))
+    assert env["SWARM_VRAM_BUDGET_GB"] == "6"
+
+
+def test_a_crashed_child_is_deregistered_even_if_reclaiming_fails(monkeypatch, run):
+    registry = FailingReclaimRegistry()
+    monkeypatch.setattr(worker_registry, "worker_registry", registry)
+    run(SwarmSupervisor(workers=1)._reclaim("host-w0.1"))
+    assert registry.deregistered == ["host-w0.1"]
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from backend import swarm_worker
+from backend.swarm_scheduler import PriorityScheduler
+from backend.vram_manager import VRAMBudget
+
+
+def test_executor_serializes_a_session_but_not_one_off_tasks(monkeypatch, run):
+    started = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def execute_task(msg):
+            started.append(msg["id"])
+            await release.wait()
+            return {"id": msg["id"], "status": "SUCCESS"}
+
+        async def settle(bus, msg, reply, claimed=None):
+            pass
+
+        monkeypatch.setattr(swarm_worker, "execute_task", execute_task)
+        monkeypatch.setattr(swarm_worker, "_settle", settle)
+        monkeypatch.setattr(swarm_worker, "CONCURRENCY", 3)
+        scheduler = PriorityScheduler(aging_interval=3600, session_of=swarm_worker._session_of)
+        executor = asyncio.create_task(swarm_worker._executor(None, scheduler, VRAMBudget(capacity_gb=100)))
+        for i in range(2):
+            await scheduler.put({"id": f"s1-{i}", "task": "status", "session_id": "s1", "priority": "batch"})
+        for i in range(2):
+            await scheduler.put({"id": f"one-off{i}", "task": "status", "priority": "batch"})
+        await asyncio.sleep(0.05)
+        running, pending = list(started), len(scheduler)
+        await scheduler.put({"id": "interactive", "task": "status", "priority": "interactive"})
+        release.set()
+        while len(started) < 4:
+            await asyncio.sleep(0.01)
+        executor.cancel()
+        return running, pending, started[3]
+
+    running, pending, fourth = run(scenario())
+    # s1 runs one task at a time; tasks without a session_id run side by side
+    assert running == ["s1-0", "one-off0", "one-off1"]
+    assert pending == 1
+    assert fourth == "interactive"
+
+
+def test_only_explicit_sessions_are_serialized():
+    assert swarm_worker._session_of({"task": "status"}) is None
+    assert swarm_worker._session_of({"task": "status", "user_id": "u", "session_id": "s"}) == ("u", "s")
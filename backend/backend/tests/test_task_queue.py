@@ -0,0 +1,69 @@
+import asyncio
+
+from backend.nexus_bus import PostgresBus
+from backend.task_queue import TaskQueue
+
+
+async def task_row(bus: PostgresBus, task_id: int):
+    async with bus.pool.acquire() as conn:
+        return await conn.fetchrow("SELECT status, attempts, last_error FROM nexus_bus_tasks WHERE id = $1", task_id)
+
+
+def test_concurrent_claims_never_hand_out_the_same_task(run, dsn):
+    async def scenario():
+        bus = PostgresBus(dsn)
+        queue = TaskQueue(bus)
+        ids = [await queue.enqueue("test_tasks", {"task": f"job {i}"}) for i in range(5)]
+        claims = await asyncio.gather(*(queue.claim("test_tasks", f"worker-{i}") for i in range(6)))
+        await bus.close()
+        return ids, claims
+
+    ids, claims = run(scenario(), timeout=20)
+    taken = [c for c in claims if c is not None]
+    assert sorted(c.id for c in taken) == sorted(ids)
+    assert claims.count(None) == 1
+
+
+def test_a_nacked_task_is_retried_after_its_delay(run, dsn):
+    async def scenario():
+        bus = PostgresBus(dsn)
+        queue = TaskQueue(bus)
+        task_id = await queue.enqueue("test_tasks", {"task": "flaky"}, max_attempts=3)
+        first = await queue.claim("test_tasks", "worker-a")
+        await queue.nack(first, "boom", retry_delay=1)
+        hidden = await queue.claim("test_tasks", "worker-b")
+        await asyncio.sleep(1.1)
+        second = await queue.claim("test_tasks", "worker-b")
+        row = await task_row(bus, task_id)
+        await bus.close()
+        return first, hidden, second, row
+
+    first, hidden, second, row = run(scenario(), timeout=20)
+    assert first.attempts == 1
+    assert hidden is None
+    assert second.id == first.id and second.attempts == 2
+    assert row["status"] == "pending" and row["last_error"] == "boom"
+
+
+def test_a_task_is_dead_lettered_after_max_attempts(run, dsn):
+    async def scenario():
+        bus = PostgresBus(dsn)
+        queue = TaskQueue(bus)
+        failing = await queue.enqueue("test_tasks", {"task": "always fails"}, max_attempts=2)
+        for _ in range(2):
+            task = await queue.claim("test_tasks", "worker-a")
+            await queue.nack(task, "boom", retry_delay=0)
+        # A worker that dies holding its final attempt dead-letters the task once the claim times out
+        abandoned = await queue.enqueue("test_tasks", {"task": "worker dies"}, max_attempts=1)
+        await queue.claim("test_tasks", "worker-a", visibility_timeout=0)
+        leftover = await queue.claim("test_tasks", "worker-b")
+        rows = [await task_row(bus, task_id) for task_id in (failing, abandoned)]
+        await bus.close()
+        return task.is_last_attempt, leftover, rows
+
+    last_attempt, leftover, (failing, abandoned) = run(scenario(), timeout=20)
+    assert last_attempt
+    assert leftover is None
+    assert (failing["status"], failing["attempts"], failing["last_error"]) == ("dead", 2, "boom")
+    assert abandoned["status"] == "dead"
+    assert abandoned["last_error"] == "visibility timeout on final attempt"
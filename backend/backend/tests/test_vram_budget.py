@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from backend.vram_manager import DEFAULT_MODEL_VRAM_GB, VRAM_LIMIT_GB, VRAMBudget, model_vram_gb
+
+
+def test_unknown_models_get_the_default_size():
+    assert model_vram_gb("some-unlisted-model:7b") == DEFAULT_MODEL_VRAM_GB
+
+
+def test_tasks_wait_until_their_model_fits(run):
+    async def scenario():
+        budget = VRAMBudget(capacity_gb=DEFAULT_MODEL_VRAM_GB * 2)
+        await budget.acquire("model-a")
+        await budget.acquire("model-b")
+        third = asyncio.create_task(budget.acquire("model-c"))
+        await asyncio.sleep(0.01)
+        waited = not third.done()
+        await budget.release("model-a")
+        await third
+        return waited, budget.stats()
+
+    waited, stats = run(scenario())
+    assert waited
+    assert stats["in_flight"] == {"model-b": 1, "model-c": 1}
+
+
+def test_a_shared_model_counts_once(run):
+    async def scenario():
+        budget = VRAMBudget(capacity_gb=DEFAULT_MODEL_VRAM_GB)
+        for _ in range(3):
+            await budget.acquire("model-a")
+        used = budget.used_gb
+        for _ in range(3):
+            await budget.release("model-a")
+        return used, budget.stats()
+
+    used, stats = run(scenario())
+    assert used == DEFAULT_MODEL_VRAM_GB
+    assert stats["in_flight"] == {} and stats["used_gb"] == 0
+
+
+def test_a_task_waits_until_all_its_models_fit(run):
+    async def scenario():
+        budget = VRAMBudget(capacity_gb=DEFAULT_MODEL_VRAM_GB * 3)
+        await budget.acquire("manager", "coder")
+        # Shares "manager", so only "browser" is new and it fits
+        await budget.acquire("manager", "browser")
+        blocked = asyncio.create_task(budget.acquire("manager", "vision"))
+        await asyncio.sleep(0.01)
+        waited = not blocked.done()
+        await budget.release("manager", "coder")
+        await blocked
+        return waited, budget.stats()["in_flight"]
+
+    waited, in_flight = run(scenario())
+    assert waited
+    assert in_flight == {"manager": 2, "browser": 1, "vision": 1}
+
+
+def test_an_oversized_model_runs_alone(run):
+    async def scenario():
+        budget = VRAMBudget(capacity_gb=1.0)
+        await budget.acquire("model-big")
+        other = asyncio.create_task(budget.acquire("model-other"))
+        await asyncio.sleep(0.01)
+        waited = not other.done()
+        await budget.release("model-big")
+        await other
+        return waited, budget.stats()["in_flight"]
+
+    waited, in_flight = run(scenario())
+    assert waited and in_flight == {"model-other": 1}
+
+
+def test_budget_reads_its_capacity_from_the_environment(monkeypatch):
+    monkeypatch.setenv("SWARM_VRAM_BUDGET_GB", "8")
+    assert VRAMBudget().capacity_gb == 8.0
+    monkeypatch.setenv("SWARM_VRAM_BUDGET_GB", "")
+    assert VRAMBudget().capacity_gb == VRAM_LIMIT_GB
+    assert VRAMBudget(capacity_gb=3.5).capacity_gb == 3.5
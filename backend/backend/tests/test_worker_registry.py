@@ -0,0 +1,72 @@
+from backend.nexus_bus import PostgresBus
+from backend.result_store import RUN, ResultStore
+from backend.task_queue import TaskQueue
+from backend.worker_registry import WorkerRegistry
+
+
+async def running_keys(bus: PostgresBus) -> list[str]:
+    async with bus.pool.acquire() as conn:
+        rows = await conn.fetch("SELECT key FROM nexus_bus_results WHERE status = 'running' ORDER BY key")
+    return [row["key"] for row in rows]
+
+
+def test_reclaim_releases_the_result_keys_of_a_dead_worker(dsn, run):
+    async def scenario():
+        bus = PostgresBus(dsn)
+        registry, store = WorkerRegistry(bus), ResultStore(bus)
+        await TaskQueue(bus)._pool()
+        await registry.heartbeat({"worker_id": "alive"})
+        await store.begin("held-by-dead", "dead", None)
+        await store.begin("held-by-alive", "alive", None)
+        await store.begin("named", "crashed", None)
+        await registry.reclaim_stuck("crashed")
+        after_named = await running_keys(bus)
+        # Begun just now: the owner may not have heartbeated yet
+        await registry.reclaim_stuck()
+        fresh = await running_keys(bus)
+        async with bus.pool.acquire() as conn:
+            await conn.execute("UPDATE nexus_bus_results SET expires_at = now() + interval '1 minute'")
+        await registry.reclaim_stuck()
+        stale = await running_keys(bus)
+        retry = await store.begin("held-by-dead", "alive", None)
+        await bus.close()
+        return after_named, fresh, stale, retry
+
+    after_named, fresh, stale, retry = run(scenario(), timeout=20)
+    assert after_named == ["held-by-alive", "held-by-dead"]
+    assert fresh == ["held-by-alive", "held-by-dead"]
+    assert stale == ["held-by-alive"]
+    assert retry == (RUN, None)
+
+
+def test_reclaim_makes_a_dead_workers_claims_visible_again(dsn, run):
+    async def scenario():
+        bus = PostgresBus(dsn)
+        registry, queue = WorkerRegistry(bus), TaskQueue(bus)
+        await ResultStore(bus)._pool()
+        await registry.heartbeat({"worker_id": "alive"})
+        dead_task = await queue.enqueue("swarm_tasks", {"id": "a", "task": "one"})
+        live_task = await queue.enqueue("swarm_tasks", {"id": "b", "task": "two"})
+        assert (await queue.claim("swarm_tasks", "dead")).id == dead_task
+        assert (await queue.claim("swarm_tasks", "alive")).id == live_task
+        reclaimed = await registry.reclaim_stuck()
+        again = await queue.claim("swarm_tasks", "alive")
+        await bus.close()
+        return reclaimed, again.id, dead_task
+
+    reclaimed, again, dead_task = run(scenario(), timeout=20)
+    assert reclaimed == [dead_task] and again == dead_task
+
+
+def test_reclaim_without_a_task_table_still_releases_result_keys(dsn, run):
+    async def scenario():
+        # Notify mode: nexus_bus_tasks is never created
+        bus = PostgresBus(dsn)
+        registry, store = WorkerRegistry(bus), ResultStore(bus)
+        await store.begin("held-by-crashed", "crashed", {"reply_to": "swarm_results", "id": "r1"})
+        reclaimed = await registry.reclaim_stuck("crashed")
+        retry = await store.begin("held-by-crashed", "restarted", {"reply_to": "swarm_results", "id": "r2"})
+        await bus.close()
+        return reclaimed, retry
+
+    assert run(scenario(), timeout=20) == ([], (RUN, None))
@@ -8,27 +8,30 @@ parent_dir = os.path.dirname(backend_dir)
 if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
-from backend.nexus_bus import bus
+from backend.nexus_bus import bus, CHUNK
+from backend.task_queue import task_queue
 
 async def main():
     print("🚀 Triggering Mission: SuccessProofV6...")
     task = "Architect, you MUST use the `build_and_register_workflow` tool to create a workflow named 'SuccessProofV6'. Model: 'qwen3:8b'. System Prompt: 'You are a research assistant'. Tools: ['search']. DO NOT HALLUCINATE. CALL THE TOOL."
-    await bus.publish("swarm_tasks", {
-        "id": "mission-v6",
-        "task": task
-    })
-    print("✅ Task sent!")
-    
-    # Listen for result
-    print("👂 Waiting for result...")
+    print("📨 Sending task and streaming the result...")
     try:
-        async for msg in bus.subscribe("swarm_results"):
-            if msg.get("id") == "mission-v6":
-                print(f"📬 Result: {msg}")
-                # Print result content for clarity
-                if "result" in msg:
-                    print(f"📝 Content: {msg['result']}")
-                break
+        # The reply listener is armed before the task goes out, so a fast answer is never missed
+        async for msg in bus.stream("swarm_tasks", {
+            "id": "mission-v6",
+            "task": task
+        }, timeout=600, send=task_queue.submit):
+            if msg.get("type") == CHUNK:
+                if msg.get("tool"):
+                    print(f"\n🔧 {msg.get('author')} called {msg['tool']}", flush=True)
+                print(msg["delta"], end="", flush=True)
+                continue
+            print(f"\n📬 Result: {msg}")
+            # Print result content for clarity
+            if "result" in msg:
+                print(f"📝 Content: {msg['result']}")
+    except asyncio.TimeoutError:
+        print("⌛ No result within 10 minutes.")
     except Exception as e:
         print(f"❌ Error listening: {e}")
 
@@ -1,8 +1,9 @@
 import httpx
 import logging
 import asyncio
+import os
 import time
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 # 🕵️ VRAM MANAGER & MODEL ORCHESTRATOR
 # This module manages model loading/unloading to stay within 16GB VRAM.
@@ -22,6 +23,83 @@ AUDITOR_MODEL = "granite3.3:8b"  # ~4.9 GB
 VRAM_LIMIT_GB = 16.0
 INACTIVITY_TIMEOUT = 300 # 5 Minutes in seconds
 
+# Resident size of each model, used to budget concurrent tasks
+MODEL_VRAM_GB: Dict[str, float] = {
+    PRIMARY_MANAGER: 5.2,
+    SENTINEL_MODEL: 1.3,
+    CODER_MODEL: 9.0,
+    BROWSER_MODEL: 6.1,
+    AUDITOR_MODEL: 4.9,
+}
+DEFAULT_MODEL_VRAM_GB = 6.0  # Unknown models are assumed to be mid-sized
+
+# Keywords that route a task to the full swarm instead of the Sentinel
+COMPLEX_KEYWORDS = ["code", "write", "architect", "deepseek", "deep seek", "qwen", "research", "solve", "sell", "fix", "build", "math", "image", "generate", "comfyui", "render"]
+
+# Keywords hinting that the manager will delegate to a specialist, and the model it will load
+SPECIALIST_KEYWORDS = {
+    CODER_MODEL: ["code", "architect", "workflow", "n8n", "deepseek", "deep seek", "r1", "fix", "build"],
+    BROWSER_MODEL: ["browser", "browse", "website", "web page", "screenshot", "click"],
+    AUDITOR_MODEL: ["audit", "security", "vulnerab", "drainer", "tweet", "discord", "post"],
+}
+
+
+def model_vram_gb(model: str) -> float:
+    """VRAM a model needs once loaded, matching tagged names by prefix."""
+    for name, size in MODEL_VRAM_GB.items():
+        if model.startswith(name):
+            return size
+    return DEFAULT_MODEL_VRAM_GB
+
+
+class VRAMBudget:
+    """
+    Admission control for concurrent tasks. A task acquires every model it is
+    expected to load (its routed model plus any specialist it will reach). A
+    model counts against the budget once, however many in-flight tasks share
+    it; tasks wait until their models fit next to what is already running.
+    Models larger than the whole budget are still admitted when nothing else
+    is in flight.
+    """
+    def __init__(self, capacity_gb: Optional[float] = None):
+        if capacity_gb is None:
+            # Read per instance; an empty setting means the whole card
+            capacity_gb = float(os.getenv("SWARM_VRAM_BUDGET_GB") or VRAM_LIMIT_GB)
+        self.capacity_gb = capacity_gb
+        self.in_flight: Dict[str, int] = {}
+        self._cond = asyncio.Condition()
+
+    @property
+    def used_gb(self) -> float:
+        return sum(model_vram_gb(model) for model in self.in_flight)
+
+    def _fits(self, models: tuple) -> bool:
+        new = {model for model in models if model not in self.in_flight}
+        if not new or not self.in_flight:
+            return True
+        return self.used_gb + sum(model_vram_gb(model) for model in new) <= self.capacity_gb
+
+    async def acquire(self, *models: str):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._fits(models))
+            for model in models:
+                self.in_flight[model] = self.in_flight.get(model, 0) + 1
+
+    async def release(self, *models: str):
+        async with self._cond:
+            for model in models:
+                self.in_flight[model] -= 1
+                if not self.in_flight[model]:
+                    del self.in_flight[model]
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            "capacity_gb": self.capacity_gb,
+            "used_gb": round(self.used_gb, 1),
+            "in_flight": dict(self.in_flight),
+        }
+
 class VRAMManager:
     def __init__(self):
         self.current_loaded_models: List[str] = []
@@ -112,15 +190,29 @@ class VRAMManager:
             except Exception as e:
                 logger.error(f"Failed to unload models: {e}")
 
+    def route_task(self, task: str) -> str:
+        """The model prepare_for_task will pick for a task, without loading anything."""
+        task_lower = task.lower()
+        # Complex triggers (8B/14B models)
+        if any(kw in task_lower for kw in COMPLEX_KEYWORDS):
+            return PRIMARY_MANAGER
+        return SENTINEL_MODEL
+
+    def predict_models(self, task: str) -> frozenset:
+        """Models a task is expected to load: its routed model plus any specialist it will likely reach."""
+        model = self.route_task(task)
+        if model == SENTINEL_MODEL:
+            return frozenset([model])
+        task_lower = task.lower()
+        specialists = [m for m, keywords in SPECIALIST_KEYWORDS.items() if any(kw in task_lower for kw in keywords)]
+        return frozenset([model, *specialists])
+
     async def prepare_for_task(self, task: str):
         """Decide which model to load based on task complexity."""
         self.update_activity()
         
         task_lower = task.lower()
-        # Complex triggers (8B/14B models)
-        is_complex = any(kw in task_lower for kw in ["code", "write", "architect", "deepseek", "deep seek", "qwen", "research", "solve", "sell", "fix", "build", "math", "image", "generate", "comfyui", "render"])
-        
-        if is_complex:
+        if self.route_task(task) == PRIMARY_MANAGER:
             # If DeepSeek-specific, we might eventually need 9GB free
             if "deepseek" in task_lower or "deep seek" in task_lower or "r1" in task_lower:
                 logger.info("🐉 DeepSeek request detected. Preparing heavy VRAM headspace...")
@@ -0,0 +1,154 @@
+"""
+Swarm Worker Registry
+Workers heartbeat what they are doing into nexus_bus_workers and onto the
+swarm_workers channel. The registry answers "who is alive and busy with
+what", and hands tasks held by dead workers back to the durable queue
+instead of waiting out their visibility timeout.
+"""
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+import asyncpg
+
+from .nexus_bus import bus, BaseBus, PostgresBus
+from .result_store import RUN_LEASE
+
+logger = logging.getLogger("worker_registry")
+
+HEARTBEAT_CHANNEL = "swarm_workers"
+HEARTBEAT_INTERVAL = float(os.getenv("SWARM_HEARTBEAT_INTERVAL", "10"))  # seconds
+WORKER_TTL = HEARTBEAT_INTERVAL * 3  # missed heartbeats before a worker counts as gone
+# Leases on tasks running longer than this are no longer renewed, so a hung inference is retried
+MAX_TASK_RUNTIME = float(os.getenv("SWARM_MAX_TASK_RUNTIME", "1800"))  # seconds
+
+
+class WorkerRegistry:
+    """Live worker set, in nexus_bus_workers on Postgres or in this process on the memory bus."""
+
+    def __init__(self, bus: BaseBus):
+        self.bus = bus
+        self._schema_ready = False
+        self._local: dict[str, dict] = {}
+
+    @property
+    def persistent(self) -> bool:
+        return isinstance(self.bus, PostgresBus)
+
+    async def _pool(self):
+        if not self.bus.pool:
+            await self.bus.connect()
+        if not self._schema_ready:
+            await self._ensure_schema()
+        return self.bus.pool
+
+    async def _ensure_schema(self):
+        async with self.bus.pool.acquire() as conn:
+            try:
+                await conn.execute("""
+                    CREATE TABLE IF NOT EXISTS nexus_bus_workers (
+                        worker_id TEXT PRIMARY KEY,
+                        info TEXT NOT NULL,
+                        started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                        heartbeat_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                    );
+                """)
+            except (asyncpg.exceptions.UniqueViolationError, asyncpg.exceptions.DuplicateTableError):
+                pass
+        self._schema_ready = True
+
+    async def heartbeat(self, info: dict):
+        """Records one worker's state and broadcasts it for dashboards."""
+        info = dict(info, ts=time.time())
+        if self.persistent:
+            pool = await self._pool()
+            async with pool.acquire() as conn:
+                await conn.execute("""
+                    INSERT INTO nexus_bus_workers (worker_id, info) VALUES ($1, $2)
+                    ON CONFLICT (worker_id) DO UPDATE SET info = EXCLUDED.info, heartbeat_at = now()
+                """, info["worker_id"], json.dumps(info))
+        else:
+            self._local[info["worker_id"]] = info
+        await self.bus.batched().publish(HEARTBEAT_CHANNEL, info)
+
+    async def deregister(self, worker_id: str):
+        if self.persistent:
+            pool = await self._pool()
+            async with pool.acquire() as conn:
+                await conn.execute("DELETE FROM nexus_bus_workers WHERE worker_id = $1", worker_id)
+        else:
+            self._local.pop(worker_id, None)
+        await self.bus.batched().publish(HEARTBEAT_CHANNEL, {"worker_id": worker_id, "status": "offline", "ts": time.time()})
+
+    async def live_workers(self) -> list[dict]:
+        """Latest heartbeat of every worker seen within WORKER_TTL seconds."""
+        if not self.persistent:
+            cutoff = time.time() - WORKER_TTL
+            return [info for info in self._local.values() if info["ts"] >= cutoff]
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT info FROM nexus_bus_workers
+                WHERE heartbeat_at >= now() - make_interval(secs => $1)
+                ORDER BY worker_id
+            """, WORKER_TTL)
+        return [json.loads(row["info"]) for row in rows]
+
+    async def reclaim_stuck(self, worker_id: Optional[str] = None) -> list[int]:
+        """
+        Makes durable tasks held by workers without a live heartbeat (or by
+        `worker_id`) claimable right away, and releases the result keys those
+        workers were running so the next claim runs instead of attaching to a
+        dead execution. Returns the task ids released. In notify mode there
+        is no task table, and only result keys are released.
+        """
+        if not self.persistent:
+            return []
+        pool = await self._pool()
+        rows, keys = [], []
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                if await conn.fetchval("SELECT to_regclass('nexus_bus_tasks') IS NOT NULL"):
+                    rows = await conn.fetch("""
+                        UPDATE nexus_bus_tasks t
+                        SET visible_at = now(), claimed_by = NULL,
+                            last_error = 'lease reclaimed from ' || t.claimed_by
+                        WHERE t.status = 'pending' AND t.claimed_by IS NOT NULL AND t.visible_at > now()
+                          AND (t.claimed_by = $2 OR NOT EXISTS (
+                              SELECT 1 FROM nexus_bus_workers w
+                              WHERE w.worker_id = t.claimed_by
+                                AND w.heartbeat_at >= now() - make_interval(secs => $1)
+                          ))
+                        RETURNING t.id
+                    """, WORKER_TTL, worker_id)
+                if await conn.fetchval("SELECT to_regclass('nexus_bus_results') IS NOT NULL"):
+                    # Keys begun or renewed within WORKER_TTL may belong to a worker yet to heartbeat,
+                    # so only keys expiring before now + RUN_LEASE - WORKER_TTL are candidates
+                    keys = await conn.fetch("""
+                        DELETE FROM nexus_bus_results r
+                        WHERE r.status = 'running'
+                          AND (r.owner = $2 OR (
+                              r.expires_at < now() + make_interval(secs => $3)
+                              AND NOT EXISTS (
+                                  SELECT 1 FROM nexus_bus_workers w
+                                  WHERE w.worker_id = r.owner
+                                    AND w.heartbeat_at >= now() - make_interval(secs => $1)
+                              )
+                          ))
+                        RETURNING r.key
+                    """, WORKER_TTL, worker_id, float(RUN_LEASE - WORKER_TTL))
+                await conn.execute(
+                    "DELETE FROM nexus_bus_workers WHERE heartbeat_at < now() - make_interval(secs => $1)",
+                    WORKER_TTL * 10
+                )
+        task_ids = [row["id"] for row in rows]
+        if task_ids:
+            logger.warning(f"♻️ Reclaimed {len(task_ids)} task(s) from dead or stuck workers: {task_ids}")
+        if keys:
+            logger.warning(f"♻️ Released {len(keys)} result key(s) held by dead or stuck workers.")
+        return task_ids
+
+
+worker_registry = WorkerRegistry(bus)